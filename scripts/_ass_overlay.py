@@ -0,0 +1,118 @@
+"""
+Shared ASS subtitle overlay (time + era labels) for render_globe.py and render_flat.py.
+
+The overlay depends only on camera_path.json frames and the header settings,
+so its SHA-1 is stored as a comment in the file and a matching file is reused
+instead of being regenerated.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+HASH_PREFIX = "; overlay-sha1: "
+
+ASS_HEADER = """[Script Info]
+{hash_line}
+Title: {title}
+ScriptType: v4.00+
+WrapStyle: 0
+PlayResX: {res_x}
+PlayResY: {res_y}
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: TimeLabel,Arial,{time_size},&H00FFFFFF,&H000000FF,&H00000000,&H80000000,-1,0,0,0,100,100,0,0,1,3,0,1,40,40,{time_margin},1
+Style: EraLabel,Arial,{era_size},&H00CCCCCC,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,2,0,1,40,40,{era_margin},1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def ass_timestamps(n_frames, fps):
+    """ASS timestamps (H:MM:SS.CC) for every frame boundary 0..n_frames."""
+    secs = np.arange(n_frames + 1) / fps
+    return [
+        f"{h}:{m:02d}:{sec:05.2f}"
+        for h, m, sec in zip((secs // 3600).astype(int).tolist(),
+                             ((secs % 3600) // 60).astype(int).tolist(),
+                             (secs % 60).tolist())
+    ]
+
+
+def build_events(path_frames, fps):
+    """Dialogue lines for consecutive frames sharing the same time_ma and era."""
+    total_frames = len(path_frames)
+    ass_times = ass_timestamps(total_frames, fps)
+
+    ass_events = []
+    prev_time_ma = None
+    prev_era = None
+    block_start_frame = 0
+
+    for pf in path_frames:
+        anim_f = pf["anim_frame"]
+        time_ma = pf["time_ma"]
+        era = pf.get("era_label", "")
+
+        if time_ma != prev_time_ma or era != prev_era:
+            # Close previous block
+            if prev_time_ma is not None:
+                start_ts = ass_times[block_start_frame]
+                end_ts = ass_times[anim_f]
+                time_str = f"{int(prev_time_ma)} Ma" if prev_time_ma == int(prev_time_ma) else f"{prev_time_ma:.1f} Ma"
+                ass_events.append(
+                    f"Dialogue: 0,{start_ts},{end_ts},TimeLabel,,0,0,0,,{time_str}"
+                )
+                if prev_era:
+                    ass_events.append(
+                        f"Dialogue: 0,{start_ts},{end_ts},EraLabel,,0,0,0,,{prev_era}"
+                    )
+            block_start_frame = anim_f
+            prev_time_ma = time_ma
+            prev_era = era
+
+    # Close final block
+    if prev_time_ma is not None:
+        start_ts = ass_times[block_start_frame]
+        end_ts = ass_times[total_frames]
+        time_str = f"{int(prev_time_ma)} Ma"
+        ass_events.append(
+            f"Dialogue: 0,{start_ts},{end_ts},TimeLabel,,0,0,0,,{time_str}"
+        )
+        if prev_era:
+            ass_events.append(
+                f"Dialogue: 0,{start_ts},{end_ts},EraLabel,,0,0,0,,{prev_era}"
+            )
+
+    return ass_events
+
+
+def build_ass(path_frames, res_x, res_y, fps, out_path, title="Tectonic Globe Overlay",
+              time_size=48, era_size=32, time_margin=35, era_margin=95):
+    """
+    Write the overlay to out_path unless an up-to-date copy is already there.
+
+    Returns (event_count, rebuilt).
+    """
+    header_fields = dict(title=title, res_x=res_x, res_y=res_y, time_size=time_size,
+                         era_size=era_size, time_margin=time_margin, era_margin=era_margin)
+    digest = hashlib.sha1(
+        json.dumps([path_frames, fps, header_fields], sort_keys=True).encode()
+    ).hexdigest()
+    hash_line = HASH_PREFIX + digest
+
+    if os.path.exists(out_path):
+        with open(out_path, 'r') as f:
+            f.readline()  # [Script Info]
+            if f.readline().rstrip("\n") == hash_line:
+                return sum(line.startswith("Dialogue:") for line in f), False
+
+    ass_events = build_events(path_frames, fps)
+    with open(out_path, 'w') as f:
+        f.write(ASS_HEADER.format(hash_line=hash_line, **header_fields)
+                + "\n".join(ass_events) + "\n")
+    return len(ass_events), True
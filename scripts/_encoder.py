@@ -0,0 +1,27 @@
+"""
+Shared ffmpeg H.264 encoder selection for render_flat.py, render_globe.py and
+render_remaining.py.
+"""
+
+import os
+import sys
+
+# Video encoder: hardware H.264 by default on macOS. Override with GLOBE_HWENC
+# (h264_nvenc, h264_qsv, h264_amf, ... or libx264 to force software).
+VIDEO_ENCODER = os.environ.get(
+    "GLOBE_HWENC", "h264_videotoolbox" if sys.platform == "darwin" else "libx264"
+)
+
+
+def encoder_args(encoder, sliced=False):
+    """ffmpeg codec flags: CRF 18 for libx264, a comparable target for hardware."""
+    if encoder == "libx264":
+        # veryfast + all cores: x264 frame threads scale near-linearly for a
+        # small size cost at the same CRF. Sliced threads (for frames arriving
+        # one at a time from a renderer) split each frame across cores so it is
+        # encoded at once instead of waiting in a frame-thread queue.
+        args = ["-c:v", "libx264", "-crf", "18", "-preset", "veryfast", "-threads", "0"]
+        return args + (["-x264-params", "sliced-threads=1"] if sliced else [])
+    if encoder.endswith("_nvenc"):
+        return ["-c:v", encoder, "-rc", "vbr", "-cq", "19", "-b:v", "0"]
+    return ["-c:v", encoder, "-b:v", "12M", "-maxrate", "18M", "-bufsize", "24M"]
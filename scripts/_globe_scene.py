@@ -0,0 +1,222 @@
+"""
+Shared Blender scene for the test_*.py scripts: textured globe, tracking
+camera, camera-parented sun lights and a dark space background.
+
+Used from Blender only (imports bpy). Scripts run via --python need the
+scripts directory on sys.path first:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+"""
+
+import glob
+import json
+import math
+import os
+
+import bpy
+
+SPHERE_RADIUS = 2.0
+SPHERE_SEGMENTS = 128
+SPHERE_RINGS = 64
+CAMERA_DISTANCE = 8.0
+CAMERA_ELEVATION = 10  # degrees above equator
+
+# Debug renders: half-size output and light anti-aliasing are enough to
+# check rotation and blending, at about a quarter of the shading work
+RESOLUTION_PERCENTAGE = 50
+EEVEE_TAA_SAMPLES = 8
+
+
+def eevee_engine_id():
+    """
+    EEVEE's render engine id for this Blender: 'BLENDER_EEVEE_NEXT' in 4.2-4.x,
+    'BLENDER_EEVEE' before and since 5.0. Read from the engine enum rather
+    than guessed from bpy.app.version.
+    """
+    engines = bpy.types.RenderSettings.bl_rna.properties['engine'].enum_items.keys()
+    return 'BLENDER_EEVEE_NEXT' if 'BLENDER_EEVEE_NEXT' in engines else 'BLENDER_EEVEE'
+
+
+def list_frames(frames_dir, pattern="globe_frame_*.png"):
+    """
+    Sorted geo frame paths in frames_dir.
+
+    The listing is cached next to the directory (frames/ -> frames.index.json)
+    and reused while the directory's mtime is unchanged; adding, removing or
+    renaming a frame bumps it. The index lives outside the directory so that
+    writing it doesn't invalidate itself.
+    """
+    frames_dir = os.path.abspath(frames_dir)
+    index_path = frames_dir + ".index.json"
+    dir_mtime = os.stat(frames_dir).st_mtime_ns
+    try:
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+        if index["mtime_ns"] == dir_mtime and index["pattern"] == pattern:
+            return [os.path.join(frames_dir, name) for name in index["files"]]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    names = sorted(os.path.basename(p) for p in glob.iglob(os.path.join(frames_dir, pattern)))
+    try:
+        with open(index_path, 'w') as f:
+            json.dump({"mtime_ns": dir_mtime, "pattern": pattern, "files": names}, f)
+    except OSError:
+        pass  # read-only checkout: just don't cache
+    return [os.path.join(frames_dir, name) for name in names]
+
+
+# Loaded texture datablocks by path, shared by every test in one Blender session
+_images = {}
+
+
+def load_image(path):
+    """Load an image once per session; later calls return the same datablock."""
+    img = _images.get(path)
+    if img is None:
+        img = bpy.data.images.load(path, check_existing=True)
+        _images[path] = img
+    return img
+
+
+def build_globe_scene(res_x, res_y, engine=None, tex_image_path=None):
+    """
+    Reset Blender and build the test scene (EEVEE unless engine is given).
+
+    Returns (scene, globe, tex_image, camera); tex_image is the globe
+    material's image texture node, so callers swap textures by assigning
+    tex_image.image.
+    """
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    _images.clear()  # the reset freed every datablock
+    scene = bpy.context.scene
+    scene.render.engine = engine or eevee_engine_id()
+    scene.render.resolution_x = res_x
+    scene.render.resolution_y = res_y
+    scene.render.resolution_percentage = RESOLUTION_PERCENTAGE
+    scene.render.image_settings.file_format = 'PNG'
+    scene.render.image_settings.color_mode = 'RGB'
+    if scene.render.engine.startswith('BLENDER_EEVEE'):
+        scene.eevee.taa_render_samples = EEVEE_TAA_SAMPLES
+
+    # Only the combined pass is written
+    view_layer = scene.view_layers[0]
+    view_layer.use_pass_z = False
+    view_layer.use_pass_normal = False
+    view_layer.use_pass_mist = False
+
+    # Globe
+    bpy.ops.mesh.primitive_uv_sphere_add(
+        segments=SPHERE_SEGMENTS, ring_count=SPHERE_RINGS,
+        radius=SPHERE_RADIUS, location=(0, 0, 0),
+    )
+    globe = bpy.context.active_object
+    globe.name = "TectonicGlobe"
+    bpy.ops.object.shade_smooth()
+
+    # Material
+    mat = bpy.data.materials.new(name="GlobeMaterial")
+    try:
+        mat.use_nodes = True
+    except AttributeError:
+        pass
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+    nodes.clear()
+
+    tex_coord = nodes.new('ShaderNodeTexCoord')
+    tex_coord.location = (-700, 0)
+    tex_image = nodes.new('ShaderNodeTexImage')
+    tex_image.name = 'TexA'
+    tex_image.location = (-400, 150)
+    bsdf = nodes.new('ShaderNodeBsdfPrincipled')
+    bsdf.location = (200, 0)
+    bsdf.inputs['Roughness'].default_value = 0.85
+    bsdf.inputs['Specular IOR Level'].default_value = 0.05
+    output_node = nodes.new('ShaderNodeOutputMaterial')
+    output_node.location = (500, 0)
+
+    if tex_image_path:
+        tex_image.image = load_image(tex_image_path)
+
+    links.new(tex_coord.outputs['UV'], tex_image.inputs['Vector'])
+    links.new(tex_image.outputs['Color'], bsdf.inputs['Base Color'])
+    links.new(bsdf.outputs['BSDF'], output_node.inputs['Surface'])
+    globe.data.materials.append(mat)
+
+    # Camera
+    cam_elev_rad = math.radians(CAMERA_ELEVATION)
+    cam_x = CAMERA_DISTANCE * math.cos(cam_elev_rad)
+    cam_z = CAMERA_DISTANCE * math.sin(cam_elev_rad)
+    bpy.ops.object.camera_add(location=(cam_x, 0, cam_z))
+    camera = bpy.context.active_object
+    camera.name = "GlobeCamera"
+    camera.data.lens = 35
+    constraint = camera.constraints.new(type='TRACK_TO')
+    constraint.target = globe
+    constraint.track_axis = 'TRACK_NEGATIVE_Z'
+    constraint.up_axis = 'UP_Y'
+    scene.camera = camera
+
+    # Lighting (parented to camera)
+    bpy.ops.object.light_add(type='SUN', location=(10, 5, 10))
+    key_light = bpy.context.active_object
+    key_light.name = "KeyLight"
+    key_light.data.energy = 3.0
+    key_light.data.angle = 0.05
+    key_light.parent = camera
+
+    bpy.ops.object.light_add(type='SUN', location=(-5, -10, -5))
+    fill_light = bpy.context.active_object
+    fill_light.name = "FillLight"
+    fill_light.data.energy = 1.0
+    fill_light.parent = camera
+
+    # Background
+    world = bpy.data.worlds.new(name="SpaceBackground")
+    scene.world = world
+    try:
+        world.use_nodes = True
+    except AttributeError:
+        pass
+    bg_node = world.node_tree.nodes.get("Background")
+    if bg_node:
+        bg_node.inputs['Color'].default_value = (0.005, 0.005, 0.02, 1.0)
+        bg_node.inputs['Strength'].default_value = 1.0
+
+    return scene, globe, tex_image, camera
+
+
+def add_crossfade_mix(globe, tex_image):
+    """
+    Insert a second texture and an RGBA Mix node between tex_image and the
+    BSDF, as in render_globe.py. Returns (tex_image_b, mix_node) with the mix
+    factor at 0.0 (pure tex_image); reuses them if already added.
+    """
+    mat = globe.data.materials[0]
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+    if 'CrossfadeMix' in nodes:
+        mix_node = nodes['CrossfadeMix']
+        mix_node.inputs[0].default_value = 0.0
+        return nodes['TexB'], mix_node
+
+    bsdf = next(n for n in nodes if n.type == 'BSDF_PRINCIPLED')
+    tex_coord = next(n for n in nodes if n.type == 'TEX_COORD')
+
+    tex_image_b = nodes.new('ShaderNodeTexImage')
+    tex_image_b.name = 'TexB'
+    tex_image_b.location = (-400, -150)
+    tex_image_b.image = tex_image.image
+
+    mix_node = nodes.new('ShaderNodeMix')
+    mix_node.name = 'CrossfadeMix'
+    mix_node.data_type = 'RGBA'
+    mix_node.location = (-100, 0)
+    mix_node.inputs[0].default_value = 0.0
+
+    links.new(tex_coord.outputs['UV'], tex_image_b.inputs['Vector'])
+    links.new(tex_image.outputs['Color'], mix_node.inputs[6])
+    links.new(tex_image_b.outputs['Color'], mix_node.inputs[7])
+    links.new(mix_node.outputs[2], bsdf.inputs['Base Color'])
+
+    return tex_image_b, mix_node
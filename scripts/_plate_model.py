@@ -0,0 +1,56 @@
+"""
+Shared Merdith2021 plate-model access for generate_frames.py and test_single_frame.py.
+
+A complete local copy is opened readonly, which makes no network requests;
+PlateModelManager only runs to download a missing or incomplete copy.
+find_fallback_files() locates the raw files for the pygplates fallbacks.
+"""
+
+from pathlib import Path
+
+MODEL_NAME = "Merdith2021"
+LAYERS = ("Rotations", "Topologies", "StaticPolygons", "Coastlines", "ContinentalPolygons")
+
+
+def _layer_files(model, layer):
+    if layer == "Rotations":
+        return model.get_rotation_model()
+    return model.get_layer(layer)
+
+
+def download_model(data_dir):
+    """Fetch (or update) every layer into data_dir and return the model."""
+    from plate_model_manager import PlateModelManager
+
+    model = PlateModelManager().get_model(MODEL_NAME, data_dir=data_dir)
+    for layer in LAYERS:
+        _layer_files(model, layer)
+    return model
+
+
+def open_model(data_dir):
+    """Return the plate model, read from disk when every layer is present."""
+    from plate_model_manager import PlateModel
+
+    # Readonly mode returns an empty file list for a missing layer rather
+    # than raising, so each one is checked before trusting the local copy
+    try:
+        model = PlateModel(MODEL_NAME, data_dir=data_dir, readonly=True)
+        if all(_layer_files(model, layer) for layer in LAYERS):
+            return model
+    except Exception:
+        pass
+    return download_model(data_dir)
+
+
+def find_fallback_files(data_dir):
+    """
+    First .rot and coastline .gpml/.gpmlz file under data_dir, as
+    (rot_file, coastline_file) Paths, either None if not found.
+    """
+    # Only one of each is used, so stop walking the tree at the first match
+    root = Path(data_dir)
+    rot_file = next(root.rglob('*.rot'), None)
+    coast_file = next((p for p in root.rglob('*.gpml*')
+                       if p.suffix in ('.gpml', '.gpmlz') and 'coastline' in p.name.lower()), None)
+    return rot_file, coast_file
@@ -0,0 +1,46 @@
+"""
+Shared intermediate frame format for render_globe.py, render_remaining.py and
+render_missing.py.
+
+Fresh renders write RENDER_FORMAT. Resumes keep writing the format of the
+frames already in the render dir, so frames from a run with another format
+are neither hidden from the resume nor mixed into one image sequence.
+"""
+
+import os
+
+# High-quality JPEG is several times smaller than PNG and the H.264 encode
+# discards losslessness anyway; 'PNG' for lossless.
+RENDER_FORMAT = 'JPEG'
+RENDER_QUALITY = 98  # JPEG only
+FORMAT_EXT = {'JPEG': '.jpg', 'PNG': '.png'}
+
+
+def detect_render_format(render_dir):
+    """Format of the newest render_NNNN frame in render_dir, else RENDER_FORMAT."""
+    newest, newest_fmt = -1, RENDER_FORMAT
+    try:
+        with os.scandir(render_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.startswith("render_"):
+                    continue
+                for fmt, ext in FORMAT_EXT.items():
+                    if name.endswith(ext):
+                        mtime = entry.stat().st_mtime_ns
+                        if mtime > newest:
+                            newest, newest_fmt = mtime, fmt
+                        break
+    except FileNotFoundError:
+        pass
+    return newest_fmt
+
+
+def apply_render_format(image_settings, fmt):
+    """Point Blender's image output settings at fmt."""
+    image_settings.file_format = fmt
+    if fmt == 'JPEG':
+        image_settings.quality = RENDER_QUALITY
+    elif fmt == 'PNG':
+        # Intermediates only: store-only PNG skips deflate on write and inflate in ffmpeg
+        image_settings.compression = 0
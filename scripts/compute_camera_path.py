@@ -17,7 +17,11 @@ Pipeline:
 import os
 import sys
 import json
+import hashlib
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+from numba import njit
 import matplotlib
 matplotlib.use('Agg')
 
@@ -25,6 +29,8 @@ matplotlib.use('Agg')
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(PROJECT_ROOT, "data", "plate-models")
 OUTPUT_PATH = os.path.join(PROJECT_ROOT, "camera_path.json")
+CACHE_DIR = os.path.join(PROJECT_ROOT, "data", "cache")
+CACHE_MANIFEST = os.path.join(CACHE_DIR, "continents_manifest.json")
 
 TIME_START = 1000  # Ma
 TIME_END = 0       # Ma
@@ -33,84 +39,179 @@ TIME_STEP = 1      # Ma
 # Smoothing: sigma in units of frames (larger = smoother camera motion)
 SMOOTH_SIGMA = 60  # ~60 Ma smoothing window (60 frames × 1 Ma = 60 Ma)
 
-# ── Load plate model ──────────────────────────────────────────
-print("Loading Merdith2021 plate model...")
-from plate_model_manager import PlateModelManager
-import gplately
-import pygplates
+# Adaptive clustering: escalate threshold until largest cluster covers enough land
+CLUSTER_THRESHOLDS = [12, 18, 25]  # degrees on great circle, tried in order
+MIN_CLUSTER_COVERAGE = 0.50         # stop escalating when largest cluster >= 50% of land
+cluster_thresholds = np.array(CLUSTER_THRESHOLDS, dtype=np.float64)
 
-pm_manager = PlateModelManager()
-model_data = pm_manager.get_model("Merdith2021", data_dir=DATA_DIR)
+# Timesteps are independent, so reconstruction fans out across processes
+NUM_WORKERS = os.cpu_count()
+WORKER_CHUNKSIZE = 8
 
-rotation_model = model_data.get_rotation_model()
-topology_features = model_data.get_topologies()
-static_polygons = model_data.get_static_polygons()
-continents_file = model_data.get_layer("ContinentalPolygons")
 
-model = gplately.PlateReconstruction(
-    rotation_model, topology_features, static_polygons
-)
-print("✓ Model loaded")
+# ── Plate model ───────────────────────────────────────────────
+def load_plate_model():
+    """Return (rotation_model, continents_file) for Merdith2021."""
+    from plate_model_manager import PlateModelManager
 
-# ── Step 1: Compute largest-landmass centroid at each timestep ─
-times = np.arange(TIME_START, TIME_END - 1, -TIME_STEP)
-total_steps = len(times)
+    pm_manager = PlateModelManager()
+    model_data = pm_manager.get_model("Merdith2021", data_dir=DATA_DIR)
+    return model_data.get_rotation_model(), model_data.get_layer("ContinentalPolygons")
 
-raw_lons = []
-raw_lats = []
-land_areas = []  # Total land area (used for dispersal metric)
 
-# Adaptive clustering: escalate threshold until largest cluster covers enough land
-CLUSTER_THRESHOLDS = [12, 18, 25]  # degrees on great circle, tried in order
-MIN_CLUSTER_COVERAGE = 0.50         # stop escalating when largest cluster >= 50% of land
+# ── Smoothing ─────────────────────────────────────────────────
+def gaussian_kernel(sigma, truncate=4.0):
+    """Normalized 1D Gaussian, same radius as scipy's gaussian_filter1d."""
+    radius = int(truncate * sigma + 0.5)
+    k = np.exp(-0.5 * (np.arange(-radius, radius + 1) / sigma) ** 2)
+    return k / k.sum()
+
 
-def haversine_deg(lat1, lon1, lat2, lon2):
-    """Angular distance in degrees between two points on sphere."""
-    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = np.sin(dlat/2)**2 + np.cos(lat1)*np.cos(lat2)*np.sin(dlon/2)**2
-    return np.degrees(2 * np.arctan2(np.sqrt(a), np.sqrt(1-a)))
+def smooth_rows(signals, kernel):
+    """
+    Gaussian-smooth each row of a (m, n) array in one FFT convolution.
 
+    Edges are mirrored (numpy 'symmetric' == scipy 'reflect'), so this
+    matches gaussian_filter1d(row, sigma) for every row.
+    """
+    from scipy.signal import fftconvolve
+
+    radius = len(kernel) // 2
+    padded = np.pad(signals, ((0, 0), (radius, radius)), mode='symmetric')
+    return fftconvolve(padded, kernel[None, :], mode='valid', axes=1)
+
+
+# ── Largest-landmass clustering ───────────────────────────────
+@njit(cache=True, fastmath=True)
 def find_root(parent, i):
-    """Union-Find: find root with path compression."""
+    """Union-Find: find root with path halving (single pass)."""
     while parent[i] != i:
         parent[i] = parent[parent[i]]
         i = parent[i]
     return i
 
-def union(parent, rank, a, b):
-    """Union-Find: merge two sets."""
+@njit(cache=True, fastmath=True)
+def union(parent, a, b):
+    """Union-Find: merge two sets (no rank; path halving keeps trees shallow)."""
     ra, rb = find_root(parent, a), find_root(parent, b)
-    if ra == rb:
-        return
-    if rank[ra] < rank[rb]:
-        ra, rb = rb, ra
-    parent[rb] = ra
-    if rank[ra] == rank[rb]:
-        rank[ra] += 1
+    if ra != rb:
+        parent[rb] = ra
+
+@njit(cache=True, fastmath=True)
+def best_cluster_centroid(areas, x, y, z, thresholds, min_coverage):
+    """
+    Area-weighted centroid of the largest cluster of polygon centroids.
+
+    Polygons closer than a threshold (great-circle degrees) are merged with
+    Union-Find; thresholds are tried in order until the heaviest cluster
+    covers at least min_coverage of the total area. x/y/z are the unit
+    vectors of the polygon centroids.
+
+    Returns (lat, lon, used_threshold, cluster_size, coverage).
+    """
+    n = len(areas)
+    total_area = areas.sum()
+
+    # float32 copies for the pairwise pass: threshold decisions tolerate
+    # ~1e-7 error; the centroid below still accumulates in float64
+    x32 = x.astype(np.float32)
+    y32 = y.astype(np.float32)
+    z32 = z.astype(np.float32)
+
+    parent = np.empty(n, dtype=np.int32)
+    cluster_areas = np.empty(n, dtype=np.float64)
+    best_root = 0
+    used_threshold = thresholds[-1]
+    coverage = 0.0
+
+    for threshold in thresholds:
+        for k in range(n):
+            parent[k] = k
+
+        # Angular distance < threshold  <=>  dot product of unit vectors > cos(threshold)
+        min_dot = np.float32(np.cos(np.radians(threshold)))
+        for a in range(n):
+            for b in range(a + 1, n):
+                if x32[a] * x32[b] + y32[a] * y32[b] + z32[a] * z32[b] > min_dot:
+                    union(parent, a, b)
+
+        # Heaviest cluster: sum polygon areas per root
+        cluster_areas[:] = 0.0
+        for k in range(n):
+            cluster_areas[find_root(parent, k)] += areas[k]
+        best_root = 0
+        for k in range(1, n):
+            if cluster_areas[k] > cluster_areas[best_root]:
+                best_root = k
+
+        coverage = cluster_areas[best_root] / total_area if total_area > 0 else 0.0
+        used_threshold = threshold
+        if coverage >= min_coverage:
+            break  # Good enough coverage at this threshold
+
+    # Area-weighted centroid of the largest cluster (in Cartesian)
+    cx, cy, cz, carea = 0.0, 0.0, 0.0, 0.0
+    cluster_size = 0
+    for k in range(n):
+        if find_root(parent, k) == best_root:
+            cx += x[k] * areas[k]
+            cy += y[k] * areas[k]
+            cz += z[k] * areas[k]
+            carea += areas[k]
+            cluster_size += 1
+
+    cx /= carea
+    cy /= carea
+    cz /= carea
+
+    centroid_lat = np.degrees(np.arctan2(cz, np.sqrt(cx**2 + cy**2)))
+    centroid_lon = np.degrees(np.arctan2(cy, cx))
+    return centroid_lat, centroid_lon, used_threshold, cluster_size, coverage
+
+
+# ── Per-timestep worker ───────────────────────────────────────
+# GPlates objects are not picklable, so the parent resolves the model's file
+# paths once and each worker parses them into pygplates objects; only raw
+# numpy arrays cross the process boundary. Parsing happens once per worker;
+# passing file names to reconstruct() would re-read and re-parse them on
+# every call.
+_rotation_model = None
+_continents = None
+_reconstructed = []  # reused output list, cleared per timestep
+
+
+def _init_worker(rotation_files, continents_files):
+    global _rotation_model, _continents
+    import pygplates
+
+    if isinstance(continents_files, str):
+        continents_files = [continents_files]
+    _rotation_model = pygplates.RotationModel(rotation_files)
+    _continents = [pygplates.FeatureCollection(f) for f in continents_files]
 
-print(f"\nComputing largest-landmass centroids for {total_steps} timesteps...")
-print(f"  Adaptive clustering thresholds: {CLUSTER_THRESHOLDS}° (min coverage: {MIN_CLUSTER_COVERAGE*100:.0f}%)")
 
-for i, time_ma in enumerate(times):
-    reconstructed = []
-    pygplates.reconstruct(continents_file, rotation_model, reconstructed, time_ma)
+def extract_polygons(time_ma):
+    """
+    Reconstruct continents at time_ma and reduce each polygon to its
+    centroid and area.
+
+    Returns None if nothing was reconstructed, otherwise (lats, lons, areas)
+    arrays for the polygons with usable geometry (possibly empty).
+    """
+    import pygplates
+
+    reconstructed = _reconstructed
+    reconstructed.clear()
+    pygplates.reconstruct(_continents, _rotation_model, reconstructed, time_ma)
 
     if not reconstructed:
-        if raw_lons:
-            raw_lons.append(raw_lons[-1])
-            raw_lats.append(raw_lats[-1])
-            land_areas.append(land_areas[-1])
-        else:
-            raw_lons.append(0.0)
-            raw_lats.append(0.0)
-            land_areas.append(0.0)
-        continue
-
-    # Extract polygon centroids and areas
-    poly_data = []  # (lat, lon, area, cart_x, cart_y, cart_z)
-    total_area = 0.0
+        return None
+
+    # Extract polygon centroids and areas into preallocated columns
+    lats = np.empty(len(reconstructed))
+    lons = np.empty(len(reconstructed))
+    areas = np.empty(len(reconstructed))
+    n = 0
 
     for rg in reconstructed:
         geom = rg.get_reconstructed_geometry()
@@ -123,365 +224,397 @@ for i, time_ma in enumerate(times):
         if area <= 0:
             area = 0.001
 
-        points = geom.to_lat_lon_list()
-        if not points:
+        # (n, 2) float64 array of (lat, lon), built in C without a list of tuples
+        points = geom.to_lat_lon_array()
+        if points.size == 0:
             continue
 
-        clat = np.mean([p[0] for p in points])
-        clon = np.mean([p[1] for p in points])
-        clat_r, clon_r = np.radians(clat), np.radians(clon)
-
-        poly_data.append({
-            'lat': clat, 'lon': clon, 'area': area,
-            'x': np.cos(clat_r) * np.cos(clon_r),
-            'y': np.cos(clat_r) * np.sin(clon_r),
-            'z': np.sin(clat_r),
-        })
-        total_area += area
-
-    land_areas.append(total_area)
-
-    if not poly_data:
-        raw_lons.append(raw_lons[-1] if raw_lons else 0.0)
-        raw_lats.append(raw_lats[-1] if raw_lats else 0.0)
-        continue
-
-    # Cluster polygons by proximity using Union-Find with adaptive threshold
-    from collections import defaultdict
-    n = len(poly_data)
-
-    # Pre-compute pairwise distances (O(n^2) but n is typically < 500)
-    pairwise_dist = {}
-    for a_idx in range(n):
-        for b_idx in range(a_idx + 1, n):
-            pairwise_dist[(a_idx, b_idx)] = haversine_deg(
-                poly_data[a_idx]['lat'], poly_data[a_idx]['lon'],
-                poly_data[b_idx]['lat'], poly_data[b_idx]['lon']
-            )
-
-    best_cluster = None
-    used_threshold = CLUSTER_THRESHOLDS[-1]
-
-    for threshold in CLUSTER_THRESHOLDS:
-        parent = list(range(n))
-        rank_arr = [0] * n
-
-        for (a_idx, b_idx), dist in pairwise_dist.items():
-            if dist < threshold:
-                union(parent, rank_arr, a_idx, b_idx)
-
-        clusters = defaultdict(list)
-        for idx in range(n):
-            root = find_root(parent, idx)
-            clusters[root].append(idx)
-
-        candidate = max(clusters.values(),
-                        key=lambda idxs: sum(poly_data[j]['area'] for j in idxs))
-        candidate_area = sum(poly_data[j]['area'] for j in candidate)
-        coverage = candidate_area / total_area if total_area > 0 else 0
-
-        best_cluster = candidate
-        used_threshold = threshold
-        if coverage >= MIN_CLUSTER_COVERAGE:
-            break  # Good enough coverage at this threshold
-
-    # Compute area-weighted centroid of the largest cluster (in Cartesian)
-    cx, cy, cz, carea = 0.0, 0.0, 0.0, 0.0
-    for j in best_cluster:
-        p = poly_data[j]
-        cx += p['x'] * p['area']
-        cy += p['y'] * p['area']
-        cz += p['z'] * p['area']
-        carea += p['area']
+        lats[n], lons[n] = points.mean(axis=0)
+        areas[n] = area
+        n += 1
+
+    return lats[:n], lons[:n], areas[:n]
+
+
+def largest_landmass(lats, lons, areas):
+    """
+    Cluster polygons by proximity and return the largest cluster's centroid
+    as (lon, lat, (used_threshold, cluster_size, coverage)).
+    """
+    # Unit vectors for each polygon centroid (for distances and area-weighted averaging)
+    lat_r = np.radians(lats)
+    lon_r = np.radians(lons)
+    cx_arr = np.cos(lat_r) * np.cos(lon_r)
+    cy_arr = np.cos(lat_r) * np.sin(lon_r)
+    cz_arr = np.sin(lat_r)
+
+    centroid_lat, centroid_lon, used_threshold, cluster_size, coverage = best_cluster_centroid(
+        areas, cx_arr, cy_arr, cz_arr, cluster_thresholds, MIN_CLUSTER_COVERAGE
+    )
+    return centroid_lon, centroid_lat, (used_threshold, cluster_size, coverage)
+
+
+# ── Reconstruction cache ──────────────────────────────────────
+# Reconstruction is deterministic for a given model and time grid, so the
+# per-step (lats, lons, areas) arrays are kept in data/cache/ between runs.
+# A warm cache skips loading the plate model entirely.
+def cache_key():
+    """Hash of the plate model files and time grid; any change invalidates."""
+    model_files = []
+    for root, dirs, files in os.walk(DATA_DIR):
+        for f in files:
+            if f.endswith(('.rot', '.gpml', '.gpmlz', '.shp')):
+                path = os.path.join(root, f)
+                st = os.stat(path)
+                model_files.append((os.path.relpath(path, DATA_DIR), st.st_size, int(st.st_mtime)))
+    key = {"files": sorted(model_files), "times": [TIME_START, TIME_END, TIME_STEP]}
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+
+def cache_path(time_ma):
+    return os.path.join(CACHE_DIR, f"continents_{int(time_ma):04d}.npz")
+
+
+def load_cached_polygons(times):
+    """Per-step polygon arrays from the cache, or None if it is cold/stale."""
+    try:
+        with open(CACHE_MANIFEST) as f:
+            if json.load(f).get("key") != cache_key():
+                return None
+    except (OSError, ValueError):
+        return None
+
+    polys = []
+    for time_ma in times:
+        path = cache_path(time_ma)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            polys.append((data["lats"], data["lons"], data["areas"]) if data["reconstructed"] else None)
+    return polys
+
+
+def save_cached_polygons(times, polys):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    empty = np.empty(0)
+    for time_ma, p in zip(times, polys):
+        lats, lons, areas = p if p is not None else (empty, empty, empty)
+        np.savez_compressed(cache_path(time_ma), lats=lats, lons=lons, areas=areas,
+                            reconstructed=p is not None)
+    # Manifest last, so an interrupted write leaves the cache cold
+    with open(CACHE_MANIFEST, 'w') as f:
+        json.dump({"key": cache_key()}, f)
+
+
+# ── Result cache ──────────────────────────────────────────────
+# The whole pipeline is deterministic in this script's source (all config
+# lives here) and the plate model files, so a finished camera_path.json is
+# kept under that hash and reused verbatim on the next identical run.
+def result_path():
+    with open(os.path.abspath(__file__), 'rb') as f:
+        source = f.read()
+    digest = hashlib.blake2b(source + cache_key().encode(), digest_size=8).hexdigest()
+    return os.path.join(CACHE_DIR, f"camera_path.{digest}.json")
+
+
+def main():
+    cached_result = result_path()
+    if os.path.exists(cached_result):
+        shutil.copyfile(cached_result, OUTPUT_PATH)
+        print(f"✓ Configuration unchanged — camera path restored from {cached_result}")
+        return
 
-    cx /= carea
-    cy /= carea
-    cz /= carea
+    times = np.arange(TIME_START, TIME_END - 1, -TIME_STEP)
+    total_steps = len(times)
 
-    centroid_lat = np.degrees(np.arctan2(cz, np.sqrt(cx**2 + cy**2)))
-    centroid_lon = np.degrees(np.arctan2(cy, cx))
+    # ── Reconstruct continents (or reuse the cache) ───────────────
+    step_polys = load_cached_polygons(times)
+    if step_polys is not None:
+        print(f"✓ Reconstructions loaded from cache ({CACHE_DIR})")
+    else:
+        # Resolve the model files once up front; workers only parse the paths
+        print("Loading Merdith2021 plate model...")
+        model_files = load_plate_model()
+        print("✓ Model loaded")
+
+        print(f"\nReconstructing continents for {total_steps} timesteps ({NUM_WORKERS} workers)...")
+        with ProcessPoolExecutor(max_workers=NUM_WORKERS, initializer=_init_worker,
+                                 initargs=model_files) as ex:
+            step_polys = list(ex.map(extract_polygons, times, chunksize=WORKER_CHUNKSIZE))
+        save_cached_polygons(times, step_polys)
+        print(f"✓ Reconstructions cached to {CACHE_DIR}")
+
+    # ── Step 1: Compute largest-landmass centroid at each timestep ─
+    raw_lons = []
+    raw_lats = []
+    land_areas = []  # Total land area (used for dispersal metric)
+    per_step_polys = []  # (lats, lons, areas) per timestep, reused for dispersal
+
+    print(f"\nComputing largest-landmass centroids for {total_steps} timesteps...")
+    print(f"  Adaptive clustering thresholds: {CLUSTER_THRESHOLDS}° (min coverage: {MIN_CLUSTER_COVERAGE*100:.0f}%)")
+
+    for i, (time_ma, polys) in enumerate(zip(times, step_polys)):
+        if polys is None:
+            per_step_polys.append(None)
+            if raw_lons:
+                raw_lons.append(raw_lons[-1])
+                raw_lats.append(raw_lats[-1])
+                land_areas.append(land_areas[-1])
+            else:
+                raw_lons.append(0.0)
+                raw_lats.append(0.0)
+                land_areas.append(0.0)
+            continue
 
-    raw_lons.append(centroid_lon)
-    raw_lats.append(centroid_lat)
+        lats, lons, areas = polys
+        land_areas.append(float(areas.sum()))
+        per_step_polys.append(polys)
 
-    if (i + 1) % 20 == 0 or i == 0:
-        cluster_area_pct = carea / total_area * 100 if total_area > 0 else 0
-        print(f"  [{i+1:3d}/{total_steps}] {int(time_ma):4d} Ma  "
-              f"largest landmass: ({centroid_lat:+6.1f}°, {centroid_lon:+7.1f}°) "
-              f"[{len(best_cluster)} polys, {cluster_area_pct:.0f}% of land, thresh={used_threshold}°]")
+        if len(areas) == 0:
+            raw_lons.append(raw_lons[-1] if raw_lons else 0.0)
+            raw_lats.append(raw_lats[-1] if raw_lats else 0.0)
+            continue
 
-raw_lons = np.array(raw_lons)
-raw_lats = np.array(raw_lats)
-land_areas = np.array(land_areas)
+        centroid_lon, centroid_lat, stats = largest_landmass(lats, lons, areas)
+        raw_lons.append(centroid_lon)
+        raw_lats.append(centroid_lat)
 
-print(f"✓ Largest-landmass centroids computed")
+        if (i + 1) % 20 == 0 or i == 0:
+            used_threshold, cluster_size, coverage = stats
+            cluster_area_pct = coverage * 100
+            print(f"  [{i+1:3d}/{total_steps}] {int(time_ma):4d} Ma  "
+                  f"largest landmass: ({centroid_lat:+6.1f}°, {centroid_lon:+7.1f}°) "
+                  f"[{cluster_size} polys, {cluster_area_pct:.0f}% of land, thresh={used_threshold:.0f}°]")
 
-# ── Step 2: Compute dispersal metric ─────────────────────────
-# Higher dispersal = continents spread out = faster camera movement appropriate
-# Use the "spread" of continental positions relative to centroid
-# This is measured by the standard deviation of polygon centroids
-print("\nComputing dispersal metric...")
+    raw_lons = np.array(raw_lons)
+    raw_lats = np.array(raw_lats)
+    land_areas = np.array(land_areas)
 
-dispersal = np.zeros(total_steps)
+    print(f"✓ Largest-landmass centroids computed")
 
-for i, time_ma in enumerate(times):
-    reconstructed = []
-    pygplates.reconstruct(continents_file, rotation_model, reconstructed, time_ma)
+    # ── Step 2: Compute dispersal metric ─────────────────────────
+    # Higher dispersal = continents spread out = faster camera movement appropriate
+    # Use the "spread" of continental positions relative to centroid
+    # This is measured by the standard deviation of polygon centroids
+    print("\nComputing dispersal metric...")
 
-    if not reconstructed:
-        dispersal[i] = dispersal[max(0, i-1)]
-        continue
+    dispersal = np.zeros(total_steps)
 
-    # Compute angular distance of each polygon centroid from the global centroid
-    dists = []
-    for rg in reconstructed:
-        geom = rg.get_reconstructed_geometry()
-        if geom is None:
-            continue
-        points = geom.to_lat_lon_list()
-        if not points:
+    for i, polys in enumerate(per_step_polys):
+        if polys is None or len(polys[2]) == 0:
+            dispersal[i] = dispersal[max(0, i-1)]
             continue
-        plat = np.radians(np.mean([p[0] for p in points]))
-        plon = np.radians(np.mean([p[1] for p in points]))
+
+        # Haversine angular distance of each polygon centroid from the global centroid
+        lats_np, lons_np, areas_np = polys
+        plat = np.radians(lats_np)
+        plon = np.radians(lons_np)
         clat = np.radians(raw_lats[i])
         clon = np.radians(raw_lons[i])
-
-        # Haversine angular distance
         dlat = plat - clat
         dlon = plon - clon
         a = np.sin(dlat/2)**2 + np.cos(clat)*np.cos(plat)*np.sin(dlon/2)**2
         dist = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-        try:
-            area = geom.get_area()
-        except:
-            area = 0.001
-        dists.append(dist * max(area, 0.001))
+        dispersal[i] = (dist * np.maximum(areas_np, 0.001)).sum() / max(land_areas[i], 0.001)
 
-    if dists:
-        dispersal[i] = np.sum(dists) / max(land_areas[i], 0.001)
+    # Normalize dispersal to 0-1
+    d_min, d_max = dispersal.min(), dispersal.max()
+    if d_max > d_min:
+        dispersal_norm = (dispersal - d_min) / (d_max - d_min)
     else:
-        dispersal[i] = dispersal[max(0, i-1)]
-
-# Normalize dispersal to 0-1
-d_min, d_max = dispersal.min(), dispersal.max()
-if d_max > d_min:
-    dispersal_norm = (dispersal - d_min) / (d_max - d_min)
-else:
-    dispersal_norm = np.zeros_like(dispersal)
-
-print(f"✓ Dispersal metric computed (min={d_min:.4f}, max={d_max:.4f})")
-
-# ── Step 3: Era-based overrides ───────────────────────────────
-# Define key geological eras with known camera targets
-# These override the computed centroid to ensure we're looking at the right thing
-print("\nApplying era-based overrides...")
-
-ERA_OVERRIDES = [
-    # (time_ma, target_lon, target_lat, label, weight)
-    # weight: 0 = use computed centroid, 1 = fully override to target
-    (1000, None, None, "Rodinia assembling", 0.0),        # Trust centroid
-    (900,  None, None, "Rodinia assembled", 0.0),          # Trust centroid
-    (750,  None, None, "Rodinia breaking up", 0.0),        # Trust centroid
-    (550,  100, -45, "Gondwana assembling", 0.5),          # Guide toward Gondwana core
-    (480,  120, -50, "Gondwana assembled", 0.5),           # Center on Australia/India cluster
-    (380,    5, -15, "Laurussia forming", 0.4),            # Northern continents merge
-    (350,    0, -10, "Pangaea assembling", 0.5),           # Drift to Pangaea center
-    (300,    0,  10, "Pangaea coalescing", 0.6),           # Center on Pangaea
-    (250,    0,  10, "Pangaea assembled", 0.7),            # Pangaea fully formed
-    (200,   20,  15, "Pangaea breaking up", 0.5),          # Central Atlantic opens
-    (150,   20,  10, "Atlantic Ocean opening", 0.3),       # Indian Ocean opens too
-    (100,   10,  10, "India racing north", 0.2),           # Let centroid lead
-    (66,     0,  10, "K-Pg extinction", 0.2),              # Brief geological moment
-    (50,     0,  20, "Modern world forming", 0.1),         # Trust centroid
-    (0,     15,  25, "Present day", 0.4),                  # Centered on Europe/Africa
-]
-
-# Interpolate era overrides to each timestep
-from scipy.interpolate import interp1d
-
-era_times = [e[0] for e in ERA_OVERRIDES]
-era_weights = [e[4] for e in ERA_OVERRIDES]
-
-# For overrides with None (trust centroid), use the computed centroid
-era_lons = []
-era_lats = []
-for e in ERA_OVERRIDES:
-    t_idx = int((TIME_START - e[0]) / TIME_STEP)
-    t_idx = max(0, min(t_idx, total_steps - 1))
-    era_lons.append(e[1] if e[1] is not None else raw_lons[t_idx])
-    era_lats.append(e[2] if e[2] is not None else raw_lats[t_idx])
-
-# Interpolate to all timesteps (reversing because eras go 1000→0 but we want monotonic)
-weight_interp = interp1d(era_times[::-1], era_weights[::-1],
-                         kind='linear', fill_value='extrapolate')
-lon_interp = interp1d(era_times[::-1], era_lons[::-1],
-                      kind='linear', fill_value='extrapolate')
-lat_interp = interp1d(era_times[::-1], era_lats[::-1],
-                      kind='linear', fill_value='extrapolate')
-
-override_weights = weight_interp(times[::-1])[::-1]
-override_lons = lon_interp(times[::-1])[::-1]
-override_lats = lat_interp(times[::-1])[::-1]
-
-# Blend computed centroid with era overrides
-blended_lons = raw_lons * (1 - override_weights) + override_lons * override_weights
-blended_lats = raw_lats * (1 - override_weights) + override_lats * override_weights
-
-print(f"✓ Era overrides applied ({len(ERA_OVERRIDES)} keyframes)")
-
-# ── Step 4: Gaussian smoothing ────────────────────────────────
-# Smooth the camera path so it doesn't jerk around
-from scipy.ndimage import gaussian_filter1d
-
-# Handle longitude wrapping: smooth in Cartesian then convert back
-lons_rad = np.radians(blended_lons)
-lats_rad = np.radians(blended_lats)
-
-# Convert to Cartesian
-cart_x = np.cos(lats_rad) * np.cos(lons_rad)
-cart_y = np.cos(lats_rad) * np.sin(lons_rad)
-cart_z = np.sin(lats_rad)
-
-# Smooth in Cartesian space
-smooth_x = gaussian_filter1d(cart_x, sigma=SMOOTH_SIGMA)
-smooth_y = gaussian_filter1d(cart_y, sigma=SMOOTH_SIGMA)
-smooth_z = gaussian_filter1d(cart_z, sigma=SMOOTH_SIGMA)
-
-# Convert back to lat/lon
-smooth_lats = np.degrees(np.arctan2(smooth_z, np.sqrt(smooth_x**2 + smooth_y**2)))
-smooth_lons = np.degrees(np.arctan2(smooth_y, smooth_x))
-
-print(f"✓ Gaussian smoothing applied (σ={SMOOTH_SIGMA} frames = {SMOOTH_SIGMA * TIME_STEP} Ma)")
-
-# ── Step 5: Variable pacing ──────────────────────────────────
-# Supercontinents (low dispersal) → more frames (slower)
-# Dispersal phases (high dispersal) → fewer frames (faster)
-print("\nComputing variable pacing...")
-
-# Smooth the dispersal metric too
-smooth_dispersal = gaussian_filter1d(dispersal_norm, sigma=SMOOTH_SIGMA)
-
-# Frame duration multiplier: low dispersal → longer, high dispersal → shorter
-# Targeting ~45-60s total video duration
-MIN_SPEED = 1.0   # Fastest: 1 frame per timestep (during max dispersal)
-MAX_SPEED = 3.0   # Slowest: 3 frames per timestep (during supercontinents)
-
-frame_duration = MIN_SPEED + (MAX_SPEED - MIN_SPEED) * (1.0 - smooth_dispersal)
-
-# Also add extra hold time at key supercontinents
-SUPERCONTINENT_HOLD = [
-    # (time_ma, extra_hold_frames, label)
-    (900, 48, "Rodinia peak"),       # 2s pause at Rodinia
-    (480, 36, "Gondwana peak"),     # 1.5s pause at Gondwana
-    (250, 60, "Pangaea peak"),      # 2.5s pause at Pangaea
-    (0, 60, "Present day"),         # 2.5s pause at present
-]
-
-# Convert to frame indices and add hold
-hold_frames = {}
-for sc_time, extra, label in SUPERCONTINENT_HOLD:
-    idx = int((TIME_START - sc_time) / TIME_STEP)
-    idx = max(0, min(idx, total_steps - 1))
-    hold_frames[idx] = (extra, label)
-    print(f"  Hold at {sc_time} Ma ({label}): +{extra} frames")
-
-# Build a lookup: time_ma → era label (for overlay text)
-def get_era_label(time_ma):
-    """Return the era label for a given time."""
-    # Find the era whose time is closest without going past
-    best = ERA_OVERRIDES[0]
+        dispersal_norm = np.zeros_like(dispersal)
+
+    print(f"✓ Dispersal metric computed (min={d_min:.4f}, max={d_max:.4f})")
+
+    # ── Step 3: Era-based overrides ───────────────────────────────
+    # Define key geological eras with known camera targets
+    # These override the computed centroid to ensure we're looking at the right thing
+    print("\nApplying era-based overrides...")
+
+    ERA_OVERRIDES = [
+        # (time_ma, target_lon, target_lat, label, weight)
+        # weight: 0 = use computed centroid, 1 = fully override to target
+        (1000, None, None, "Rodinia assembling", 0.0),        # Trust centroid
+        (900,  None, None, "Rodinia assembled", 0.0),          # Trust centroid
+        (750,  None, None, "Rodinia breaking up", 0.0),        # Trust centroid
+        (550,  100, -45, "Gondwana assembling", 0.5),          # Guide toward Gondwana core
+        (480,  120, -50, "Gondwana assembled", 0.5),           # Center on Australia/India cluster
+        (380,    5, -15, "Laurussia forming", 0.4),            # Northern continents merge
+        (350,    0, -10, "Pangaea assembling", 0.5),           # Drift to Pangaea center
+        (300,    0,  10, "Pangaea coalescing", 0.6),           # Center on Pangaea
+        (250,    0,  10, "Pangaea assembled", 0.7),            # Pangaea fully formed
+        (200,   20,  15, "Pangaea breaking up", 0.5),          # Central Atlantic opens
+        (150,   20,  10, "Atlantic Ocean opening", 0.3),       # Indian Ocean opens too
+        (100,   10,  10, "India racing north", 0.2),           # Let centroid lead
+        (66,     0,  10, "K-Pg extinction", 0.2),              # Brief geological moment
+        (50,     0,  20, "Modern world forming", 0.1),         # Trust centroid
+        (0,     15,  25, "Present day", 0.4),                  # Centered on Europe/Africa
+    ]
+
+    # Interpolate era overrides to each timestep
+    era_times = np.array([e[0] for e in ERA_OVERRIDES], dtype=np.float64)
+    era_weights = np.array([e[4] for e in ERA_OVERRIDES], dtype=np.float64)
+
+    # For overrides with None (trust centroid), use the computed centroid
+    era_lons = []
+    era_lats = []
     for e in ERA_OVERRIDES:
-        if e[0] >= time_ma:
-            best = e
-    return best[3]
-
-# Build final frame mapping
-# Each geological timestep maps to a variable number of animation frames
-output_frames = []
-anim_frame = 0
-
-for i in range(total_steps):
-    time_ma = float(times[i])
-    era_label = get_era_label(time_ma)
-
-    # Base frame(s) for this timestep
-    n_frames = max(1, int(round(frame_duration[i])))
-    for sub in range(n_frames):
-        # Interpolate position within this timestep if multiple frames
-        t = sub / n_frames if n_frames > 1 else 0
-        if i < total_steps - 1:
-            interp_lon = smooth_lons[i] * (1 - t) + smooth_lons[i + 1] * t
-            interp_lat = smooth_lats[i] * (1 - t) + smooth_lats[i + 1] * t
-        else:
-            interp_lon = smooth_lons[i]
-            interp_lat = smooth_lats[i]
-
-        output_frames.append({
+        t_idx = int((TIME_START - e[0]) / TIME_STEP)
+        t_idx = max(0, min(t_idx, total_steps - 1))
+        era_lons.append(e[1] if e[1] is not None else raw_lons[t_idx])
+        era_lats.append(e[2] if e[2] is not None else raw_lats[t_idx])
+
+    # np.interp needs increasing x, so interpolate on the reversed (0→1000) axes.
+    # Keyframes span the whole time range, so no extrapolation is needed.
+    t_rev = times[::-1]
+    override_weights = np.interp(t_rev, era_times[::-1], era_weights[::-1])[::-1]
+    override_lons = np.interp(t_rev, era_times[::-1], np.array(era_lons)[::-1])[::-1]
+    override_lats = np.interp(t_rev, era_times[::-1], np.array(era_lats)[::-1])[::-1]
+
+    # Blend computed centroid with era overrides
+    blended_lons = raw_lons * (1 - override_weights) + override_lons * override_weights
+    blended_lats = raw_lats * (1 - override_weights) + override_lats * override_weights
+
+    print(f"✓ Era overrides applied ({len(ERA_OVERRIDES)} keyframes)")
+
+    # ── Step 4: Gaussian smoothing ────────────────────────────────
+    # Smooth the camera path so it doesn't jerk around
+    # Handle longitude wrapping: smooth in Cartesian then convert back
+    lons_rad = np.radians(blended_lons)
+    lats_rad = np.radians(blended_lats)
+
+    # Convert to Cartesian
+    cart_x = np.cos(lats_rad) * np.cos(lons_rad)
+    cart_y = np.cos(lats_rad) * np.sin(lons_rad)
+    cart_z = np.sin(lats_rad)
+
+    # Smooth in Cartesian space (dispersal rides along for Step 5)
+    kernel = gaussian_kernel(SMOOTH_SIGMA)
+    smooth_x, smooth_y, smooth_z, smooth_dispersal = smooth_rows(
+        np.stack([cart_x, cart_y, cart_z, dispersal_norm]), kernel
+    )
+
+    # Convert back to lat/lon
+    smooth_lats = np.degrees(np.arctan2(smooth_z, np.sqrt(smooth_x**2 + smooth_y**2)))
+    smooth_lons = np.degrees(np.arctan2(smooth_y, smooth_x))
+
+    print(f"✓ Gaussian smoothing applied (σ={SMOOTH_SIGMA} frames = {SMOOTH_SIGMA * TIME_STEP} Ma)")
+
+    # ── Step 5: Variable pacing ──────────────────────────────────
+    # Supercontinents (low dispersal) → more frames (slower)
+    # Dispersal phases (high dispersal) → fewer frames (faster)
+    print("\nComputing variable pacing...")
+
+    # Frame duration multiplier: low dispersal → longer, high dispersal → shorter
+    # Targeting ~45-60s total video duration
+    MIN_SPEED = 1.0   # Fastest: 1 frame per timestep (during max dispersal)
+    MAX_SPEED = 3.0   # Slowest: 3 frames per timestep (during supercontinents)
+
+    frame_duration = MIN_SPEED + (MAX_SPEED - MIN_SPEED) * (1.0 - smooth_dispersal)
+
+    # Also add extra hold time at key supercontinents
+    SUPERCONTINENT_HOLD = [
+        # (time_ma, extra_hold_frames, label)
+        (900, 48, "Rodinia peak"),       # 2s pause at Rodinia
+        (480, 36, "Gondwana peak"),     # 1.5s pause at Gondwana
+        (250, 60, "Pangaea peak"),      # 2.5s pause at Pangaea
+        (0, 60, "Present day"),         # 2.5s pause at present
+    ]
+
+    # Convert to frame indices and add hold
+    hold_frames = {}
+    for sc_time, extra, label in SUPERCONTINENT_HOLD:
+        idx = int((TIME_START - sc_time) / TIME_STEP)
+        idx = max(0, min(idx, total_steps - 1))
+        hold_frames[idx] = (extra, label)
+        print(f"  Hold at {sc_time} Ma ({label}): +{extra} frames")
+
+    # Era label per timestep (for overlay text): the latest era whose time
+    # is at or before time_ma. era_times is decreasing, so negate for searchsorted.
+    era_idx = np.searchsorted(-era_times, -times, side='right') - 1
+    labels_for_step = [ERA_OVERRIDES[k][3] for k in np.maximum(era_idx, 0)]
+
+    # Build final frame mapping
+    # Each geological timestep maps to a variable number of animation frames:
+    # n_base interpolated frames followed by any supercontinent hold frames
+    n_base = np.maximum(1, np.rint(frame_duration).astype(np.int64))
+    n_hold = np.zeros(total_steps, dtype=np.int64)
+    for idx, (extra, label) in hold_frames.items():
+        n_hold[idx] = extra
+    counts = n_base + n_hold
+
+    step = np.repeat(np.arange(total_steps), counts)           # geo_frame_idx per frame
+    sub = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    base = sub < n_base[step]
+
+    # Interpolate position within the timestep; hold frames sit at t = 0
+    t = np.where(base, sub / n_base[step], 0.0)
+    nxt = np.minimum(step + 1, total_steps - 1)
+    frame_lons = smooth_lons[step] * (1 - t) + smooth_lons[nxt] * t
+    frame_lats = smooth_lats[step] * (1 - t) + smooth_lats[nxt] * t
+
+    output_frames = [
+        {
             "anim_frame": anim_frame,
             "time_ma": time_ma,
             "geo_frame_idx": i,  # Index into globe_frame_NNNN.png
-            "camera_lon": float(interp_lon),
-            "camera_lat": float(interp_lat),
-            "dispersal": float(smooth_dispersal[i]),
-            "era_label": era_label,
-        })
-        anim_frame += 1
-
-    # Add hold frames at supercontinents
-    if i in hold_frames:
-        extra, label = hold_frames[i]
-        for h in range(extra):
-            output_frames.append({
-                "anim_frame": anim_frame,
-                "time_ma": time_ma,
-                "geo_frame_idx": i,
-                "camera_lon": float(smooth_lons[i]),
-                "camera_lat": float(smooth_lats[i]),
-                "dispersal": float(smooth_dispersal[i]),
-                "era_label": era_label,
-            })
-            anim_frame += 1
-
-total_anim_frames = len(output_frames)
-print(f"\n✓ Variable pacing computed:")
-print(f"  Geological timesteps: {total_steps}")
-print(f"  Animation frames: {total_anim_frames}")
-print(f"  Duration at 24fps: {total_anim_frames / 24:.1f}s")
-print(f"  Duration at 30fps: {total_anim_frames / 30:.1f}s")
-
-# ── Step 6: Export ────────────────────────────────────────────
-camera_path = {
-    "metadata": {
-        "time_range": f"{TIME_START} Ma to {TIME_END} Ma",
-        "time_step": TIME_STEP,
-        "geological_timesteps": total_steps,
-        "animation_frames": total_anim_frames,
-        "smooth_sigma": SMOOTH_SIGMA,
-        "pacing": f"variable ({MIN_SPEED}x to {MAX_SPEED}x)",
-    },
-    "eras": [
-        {"time_ma": e[0], "label": e[3]} for e in ERA_OVERRIDES
-    ],
-    "frames": output_frames,
-}
-
-with open(OUTPUT_PATH, 'w') as f:
-    json.dump(camera_path, f, indent=2)
-
-print(f"\n✓ Camera path exported to: {OUTPUT_PATH}")
-print(f"  File size: {os.path.getsize(OUTPUT_PATH) / 1024:.0f} KB")
-
-# ── Summary ───────────────────────────────────────────────────
-print(f"\n{'='*60}")
-print(f"CAMERA PATH SUMMARY")
-print(f"{'='*60}")
-print(f"  Start: {times[0]:.0f} Ma → camera at ({smooth_lats[0]:+.1f}°, {smooth_lons[0]:+.1f}°)")
-print(f"  End:   {times[-1]:.0f} Ma → camera at ({smooth_lats[-1]:+.1f}°, {smooth_lons[-1]:+.1f}°)")
-print(f"  Total animation frames: {total_anim_frames}")
-print(f"  Key moments:")
-for sc_time, extra, label in SUPERCONTINENT_HOLD:
-    idx = int((TIME_START - sc_time) / TIME_STEP)
-    idx = max(0, min(idx, total_steps - 1))
-    print(f"    {sc_time:4d} Ma ({label}): camera at "
-          f"({smooth_lats[idx]:+.1f}°, {smooth_lons[idx]:+.1f}°), "
-          f"dispersal={smooth_dispersal[idx]:.2f}")
+            "camera_lon": lon,
+            "camera_lat": lat,
+            "dispersal": disp,
+            "era_label": labels_for_step[i],
+        }
+        for anim_frame, (i, time_ma, lon, lat, disp) in enumerate(zip(
+            step.tolist(), times[step].astype(float).tolist(), frame_lons.tolist(),
+            frame_lats.tolist(), smooth_dispersal[step].tolist(),
+        ))
+    ]
+
+    total_anim_frames = len(output_frames)
+    print(f"\n✓ Variable pacing computed:")
+    print(f"  Geological timesteps: {total_steps}")
+    print(f"  Animation frames: {total_anim_frames}")
+    print(f"  Duration at 24fps: {total_anim_frames / 24:.1f}s")
+    print(f"  Duration at 30fps: {total_anim_frames / 30:.1f}s")
+
+    # ── Step 6: Export ────────────────────────────────────────────
+    camera_path = {
+        "metadata": {
+            "time_range": f"{TIME_START} Ma to {TIME_END} Ma",
+            "time_step": TIME_STEP,
+            "geological_timesteps": total_steps,
+            "animation_frames": total_anim_frames,
+            "smooth_sigma": SMOOTH_SIGMA,
+            "pacing": f"variable ({MIN_SPEED}x to {MAX_SPEED}x)",
+        },
+        "eras": [
+            {"time_ma": e[0], "label": e[3]} for e in ERA_OVERRIDES
+        ],
+        "frames": output_frames,
+    }
+
+    with open(OUTPUT_PATH, 'w') as f:
+        json.dump(camera_path, f, indent=2)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    shutil.copyfile(OUTPUT_PATH, cached_result)
+
+    print(f"\n✓ Camera path exported to: {OUTPUT_PATH}")
+    print(f"  File size: {os.path.getsize(OUTPUT_PATH) / 1024:.0f} KB")
+
+    # ── Summary ───────────────────────────────────────────────────
+    print(f"\n{'='*60}")
+    print(f"CAMERA PATH SUMMARY")
+    print(f"{'='*60}")
+    print(f"  Start: {times[0]:.0f} Ma → camera at ({smooth_lats[0]:+.1f}°, {smooth_lons[0]:+.1f}°)")
+    print(f"  End:   {times[-1]:.0f} Ma → camera at ({smooth_lats[-1]:+.1f}°, {smooth_lons[-1]:+.1f}°)")
+    print(f"  Total animation frames: {total_anim_frames}")
+    print(f"  Key moments:")
+    for sc_time, extra, label in SUPERCONTINENT_HOLD:
+        idx = int((TIME_START - sc_time) / TIME_STEP)
+        idx = max(0, min(idx, total_steps - 1))
+        print(f"    {sc_time:4d} Ma ({label}): camera at "
+              f"({smooth_lats[idx]:+.1f}°, {smooth_lons[idx]:+.1f}°), "
+              f"dispersal={smooth_dispersal[idx]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
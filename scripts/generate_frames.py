@@ -8,16 +8,26 @@ plate reconstruction model.
 
 Output frames are 4096x2048 equirectangular (PlateCarree) projection,
 suitable for UV-mapping onto a sphere in Blender.
+
+Usage:
+    python3 scripts/generate_frames.py              # all frames, one process
+    python3 scripts/generate_frames.py --jobs 8     # 8 shard processes in parallel
+    python3 scripts/generate_frames.py --shard 2/8  # only frames 2, 10, 18, ...
 """
 
 import os
 import sys
+import argparse
+import subprocess
 import time as pytime
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Headless rendering — no GUI
 import matplotlib.pyplot as plt
 import cartopy.crs as ccrs
+from PIL import Image, ImageDraw
+
+from _plate_model import find_fallback_files, open_model
 
 # ── Configuration ──────────────────────────────────────────────
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -40,13 +50,77 @@ COASTLINE_COLOR = '#5c442e'
 RIDGE_COLOR = '#ff6b35'
 TRENCH_COLOR = '#e63946'
 
+# PNG zlib level — 1 encodes several times faster than matplotlib's default
+# at the cost of somewhat larger files (they are only intermediates)
+PNG_COMPRESS_LEVEL = 1
+
+# pygplates fallback: polygons are drawn on a SUPERSAMPLE× Pillow canvas and
+# downscaled with LANCZOS for anti-aliased edges; the coastline width matches
+# the 0.5 pt line Agg draws at DPI
+SUPERSAMPLE = 2
+COASTLINE_PX = max(1, round(0.5 * DPI / 72 * SUPERSAMPLE))
+
+# ── Command line ───────────────────────────────────────────────
+# Frames are independent, so the time range can be split across processes.
+# matplotlib figures are not thread-safe, so each shard is its own process.
+parser = argparse.ArgumentParser(description="Generate equirectangular tectonic plate frames.")
+parser.add_argument("--shard", default="0/1", metavar="K/N",
+                    help="render only every Nth frame starting at frame K (default: 0/1)")
+parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                    help="launch N shard processes in parallel and wait for them")
+args = parser.parse_args()
+
+shard_k, shard_n = (int(v) for v in args.shard.split("/"))
+if not 0 <= shard_k < shard_n:
+    parser.error(f"invalid --shard {args.shard}: need 0 <= K < N")
+
 # ── Setup ──────────────────────────────────────────────────────
 os.makedirs(FRAMES_DIR, exist_ok=True)
 
 # Build time array: 1000, 995, 990, ..., 5, 0
 times = np.arange(TIME_START, TIME_END - 1, -TIME_STEP)
 total_frames = len(times)
-print(f"Will generate {total_frames} frames from {TIME_START} Ma to {TIME_END} Ma")
+
+
+def count_frames():
+    return len([f for f in os.listdir(FRAMES_DIR)
+                if f.startswith(FRAME_PREFIX) and f.endswith('.png')])
+
+
+if args.jobs > 1:
+    # Make sure the model is on disk here, once: shards fetching it
+    # concurrently on a first run would race to unpack into the same data
+    # dir. They then find the complete local copy and open it readonly.
+    print("Checking Merdith2021 plate model before launching shards...")
+    try:
+        open_model(DATA_DIR)
+        print("✓ Model ready")
+    except Exception as e:
+        print(f"⚠ Model download failed: {e}")
+
+    print(f"Launching {args.jobs} shard processes for {total_frames} frames...")
+    start = pytime.time()
+    procs = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--shard", f"{k}/{args.jobs}"])
+        for k in range(args.jobs)
+    ]
+    failed = [k for k, proc in enumerate(procs) if proc.wait() != 0]
+    total_time = pytime.time() - start
+    if failed:
+        print(f"\n✗ Shards failed: {failed}")
+        sys.exit(1)
+    actual_frames = count_frames()
+    print(f"\n✓ Done! {args.jobs} shards finished in {total_time/60:.1f} minutes")
+    if actual_frames == total_frames:
+        print(f"  Verification: {actual_frames} frames found ✓")
+    else:
+        print(f"  ⚠ Expected {total_frames} frames, found {actual_frames}")
+    sys.exit(0)
+
+# Stride sharding keeps each shard's frames spread over the whole time range
+frame_indices = list(range(shard_k, total_frames, shard_n))
+shard_str = f" (shard {shard_k}/{shard_n})" if shard_n > 1 else ""
+print(f"Will generate {len(frame_indices)} of {total_frames} frames from {TIME_START} Ma to {TIME_END} Ma{shard_str}")
 print(f"Output: {FRAMES_DIR}/{FRAME_PREFIX}NNNN.png at {IMAGE_WIDTH}x{IMAGE_HEIGHT}")
 
 # ── Load plate model ──────────────────────────────────────────
@@ -54,11 +128,9 @@ print("\nLoading Merdith2021 plate model...")
 
 USE_GPLATELY = True
 try:
-    from plate_model_manager import PlateModelManager
     import gplately
 
-    pm_manager = PlateModelManager()
-    model_data = pm_manager.get_model("Merdith2021", data_dir=DATA_DIR)
+    model_data = open_model(DATA_DIR)
 
     rotation_model = model_data.get_rotation_model()
     topology_features = model_data.get_topologies()
@@ -82,35 +154,49 @@ except Exception as e:
     USE_GPLATELY = False
 
     import pygplates
+    import shapely  # ships with cartopy
 
-    rot_files = []
-    gpml_coast = []
-    for root, dirs, files in os.walk(DATA_DIR):
-        for f in files:
-            if f.endswith('.rot'):
-                rot_files.append(os.path.join(root, f))
-            if f.endswith('.gpml') and 'coastline' in f.lower():
-                gpml_coast.append(os.path.join(root, f))
-
-    if not rot_files or not gpml_coast:
-        print(f"✗ ERROR: Missing .rot or coastline .gpml in {DATA_DIR}")
+    rot_file, coast_file = find_fallback_files(DATA_DIR)
+    if rot_file is None or coast_file is None:
+        print(f"✗ ERROR: Missing .rot or coastline .gpml/.gpmlz in {DATA_DIR}")
         sys.exit(1)
 
-    pg_rotation = pygplates.RotationModel(rot_files[0])
-    pg_coastlines = pygplates.FeatureCollection(gpml_coast[0])
-    print(f"✓ pygplates fallback loaded ({rot_files[0]})")
+    pg_rotation = pygplates.RotationModel(str(rot_file))
+    pg_coastlines = pygplates.FeatureCollection(str(coast_file))
+    print(f"✓ pygplates fallback loaded ({rot_file}, {coast_file.name})")
 
 
-def render_frame_gplately(time_ma, frame_idx):
-    """Render a single frame using gplately PlotTopologies."""
-    fig_w = IMAGE_WIDTH / DPI
-    fig_h = IMAGE_HEIGHT / DPI
-    fig = plt.figure(figsize=(fig_w, fig_h), dpi=DPI)
+# ── Shared figure ─────────────────────────────────────────────
+# One Agg canvas and GeoAxes for every gplately frame; only the artists
+# change. The pygplates fallback draws with Pillow and needs neither.
+if USE_GPLATELY:
+    fig = plt.figure(figsize=(IMAGE_WIDTH / DPI, IMAGE_HEIGHT / DPI), dpi=DPI,
+                     facecolor=OCEAN_COLOR)
     ax = fig.add_axes([0, 0, 1, 1], projection=ccrs.PlateCarree(central_longitude=0))
+
+
+def reset_axes():
+    """Drop the previous frame's artists and restore the map extent/styling."""
+    ax.clear()
     ax.set_global()
     ax.set_axis_off()
     ax.set_facecolor(OCEAN_COLOR)
 
+
+def save_frame(frame_idx):
+    """Rasterize the figure and write the Agg RGBA buffer straight to PNG."""
+    out_path = os.path.join(FRAMES_DIR, f'{FRAME_PREFIX}{frame_idx:04d}.png')
+    fig.canvas.draw()
+    buf = np.asarray(fig.canvas.buffer_rgba())
+    Image.fromarray(buf).save(out_path, format='PNG',
+                              compress_level=PNG_COMPRESS_LEVEL, optimize=False)
+    return out_path
+
+
+def render_frame_gplately(time_ma, frame_idx):
+    """Render a single frame using gplately PlotTopologies."""
+    reset_axes()
+
     # Set reconstruction time
     gplot.time = time_ma
 
@@ -148,69 +234,111 @@ def render_frame_gplately(time_ma, frame_idx):
         pass
 
     # Save (no text label — subtitle overlay handles time/era display)
-    out_path = os.path.join(FRAMES_DIR, f'{FRAME_PREFIX}{frame_idx:04d}.png')
-    fig.savefig(out_path, dpi=DPI, facecolor=OCEAN_COLOR, pad_inches=0)
-    plt.close(fig)
-    return out_path
+    return save_frame(frame_idx)
 
 
 def render_frame_pygplates(time_ma, frame_idx):
-    """Render a single frame using raw pygplates (fallback)."""
-    fig_w = IMAGE_WIDTH / DPI
-    fig_h = IMAGE_HEIGHT / DPI
-    fig = plt.figure(figsize=(fig_w, fig_h), dpi=DPI)
-    ax = fig.add_axes([0, 0, 1, 1], projection=ccrs.PlateCarree(central_longitude=0))
-    ax.set_global()
-    ax.set_axis_off()
-    ax.set_facecolor(OCEAN_COLOR)
+    """
+    Render a single frame using raw pygplates (fallback).
+
+    Equirectangular lat/lon maps linearly onto pixels, so polygons are
+    scan-converted straight onto a supersampled Pillow canvas, skipping
+    matplotlib/cartopy. Longitudes are unwrapped and each geometry is drawn
+    at -360/0/+360 degree offsets, so the canvas edges clip it at the
+    antimeridian instead of it smearing across the frame.
+    """
+    width, height = IMAGE_WIDTH * SUPERSAMPLE, IMAGE_HEIGHT * SUPERSAMPLE
+    img = Image.new('RGB', (width, height), OCEAN_COLOR)
+    draw = ImageDraw.Draw(img)
+
+    def pixels(lon, lat):
+        return np.column_stack([(lon + 180.0) * (width / 360.0),
+                                (90.0 - lat) * (height / 180.0)]).ravel().tolist()
 
     # Reconstruct coastlines
     reconstructed = []
     pygplates.reconstruct(pg_coastlines, pg_rotation, reconstructed, time_ma)
 
     for rg in reconstructed:
-        polygon = rg.get_reconstructed_geometry()
-        if polygon:
-            points = polygon.to_lat_lon_list()
-            lons = [p[1] for p in points]
-            lats = [p[0] for p in points]
-            ax.fill(lons, lats, color=CONTINENT_COLOR, edgecolor=COASTLINE_COLOR,
-                    linewidth=0.5, transform=ccrs.Geodetic())
+        geom = rg.get_reconstructed_geometry()
+        if not geom:
+            continue
+        latlon = geom.to_lat_lon_array()  # (n, 2) lat/lon in one call
+        if len(latlon) < 2:
+            continue
+        lat = latlon[:, 0]
+        lon = np.unwrap(latlon[:, 1], period=360.0)
+        line_lon, line_lat = lon, lat
+        fill = isinstance(geom, pygplates.PolygonOnSphere) and len(latlon) >= 3
+        if fill:
+            # Close the ring; a ring that winds all the way round encloses a
+            # pole, so its fill is closed along that pole's edge of the map
+            end_lon = lon[-1] + (lon[0] - lon[-1] + 180.0) % 360.0 - 180.0
+            line_lon, line_lat = np.append(lon, end_lon), np.append(lat, lat[0])
+            fill_lon, fill_lat = lon, lat
+            if round((end_lon - lon[0]) / 360.0):
+                pole = 90.0 if lat.mean() > 0 else -90.0
+                fill_lon = np.append(lon, [end_lon, end_lon, lon[0]])
+                fill_lat = np.append(lat, [lat[0], pole, pole])
+            # Pillow fills even-odd, which punches holes where a ring crosses
+            # itself; repair those few with shapely as cartopy does for gplately
+            rings = [np.column_stack([fill_lon, fill_lat])]
+            ring = shapely.Polygon(rings[0])
+            if not ring.is_valid:
+                rings = [np.asarray(part.exterior.coords)
+                         for part in shapely.get_parts(ring.buffer(0))]
+
+        for shift in (-360.0, 0.0, 360.0):
+            if line_lon.max() + shift < -180.0 or line_lon.min() + shift > 180.0:
+                continue
+            if fill:
+                for ring in rings:
+                    draw.polygon(pixels(ring[:, 0] + shift, ring[:, 1]), fill=CONTINENT_COLOR)
+            draw.line(pixels(line_lon + shift, line_lat), fill=COASTLINE_COLOR,
+                      width=COASTLINE_PX, joint='curve')
+
+    img = img.resize((IMAGE_WIDTH, IMAGE_HEIGHT), Image.LANCZOS)
 
     # Save (no text label — subtitle overlay handles time/era display)
     out_path = os.path.join(FRAMES_DIR, f'{FRAME_PREFIX}{frame_idx:04d}.png')
-    fig.savefig(out_path, dpi=DPI, facecolor=OCEAN_COLOR, pad_inches=0)
-    plt.close(fig)
+    img.save(out_path, format='PNG', compress_level=PNG_COMPRESS_LEVEL, optimize=False)
     return out_path
 
 
 # ── Main rendering loop ───────────────────────────────────────
 render_fn = render_frame_gplately if USE_GPLATELY else render_frame_pygplates
 
-print(f"\nRendering {total_frames} frames using {'gplately' if USE_GPLATELY else 'pygplates'}...\n")
+n_frames = len(frame_indices)
+
+print(f"\nRendering {n_frames} frames using {'gplately' if USE_GPLATELY else 'pygplates'}...\n")
 start = pytime.time()
 
-for i, time_ma in enumerate(times):
+for n, i in enumerate(frame_indices):
+    time_ma = times[i]
     t0 = pytime.time()
     out_path = render_fn(time_ma, i)
     elapsed = pytime.time() - t0
 
     # Progress
-    pct = (i + 1) / total_frames * 100
+    pct = (n + 1) / n_frames * 100
     total_elapsed = pytime.time() - start
-    avg_per_frame = total_elapsed / (i + 1)
-    remaining = avg_per_frame * (total_frames - i - 1)
+    avg_per_frame = total_elapsed / (n + 1)
+    remaining = avg_per_frame * (n_frames - n - 1)
 
-    print(f"  [{i+1:3d}/{total_frames}] {pct:5.1f}%  {int(time_ma):4d} Ma  "
+    print(f"  [{n+1:3d}/{n_frames}] {pct:5.1f}%  {int(time_ma):4d} Ma  "
           f"{elapsed:.1f}s  ETA {remaining/60:.1f}min  → {os.path.basename(out_path)}")
 
+if USE_GPLATELY:
+    plt.close(fig)
+
 total_time = pytime.time() - start
-print(f"\n✓ Done! {total_frames} frames generated in {total_time/60:.1f} minutes")
+print(f"\n✓ Done! {n_frames} frames generated in {total_time/60:.1f} minutes{shard_str}")
 print(f"  Output: {FRAMES_DIR}/")
 
-# Verify
-actual_frames = len([f for f in os.listdir(FRAMES_DIR)
-                     if f.startswith(FRAME_PREFIX) and f.endswith('.png')])
+# Verify (only meaningful once every shard has run)
+if shard_n > 1:
+    sys.exit(0)
+actual_frames = count_frames()
 if actual_frames == total_frames:
     print(f"  Verification: {actual_frames} frames found ✓")
 else:
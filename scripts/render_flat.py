@@ -4,21 +4,40 @@ Assemble flat-projection (equirectangular) companion video with crossfade blendi
 
 No Blender needed — reads source PNGs from frames/ and uses
 camera_path.json for timing + subtitle data. Crossfades between
-consecutive geological frames using PIL alpha-blending for smooth transitions.
+consecutive geological frames with a fixed-point NumPy blend and streams
+raw frames straight into ffmpeg.
 
 Usage:
     python3 scripts/render_flat.py
+    python3 scripts/render_flat.py --device mps   # blend crossfades on the GPU (needs PyTorch)
+
+Performance: PNG decoding and Lanczos downscaling of the 4096x2048 source
+frames is the hot loop. Pillow-SIMD is a drop-in replacement with SSE4/AVX2
+resampling and conversion paths; it needs an AVX2 CPU and must be built
+from source in place of stock Pillow:
+    pip uninstall -y pillow && CC="cc -mavx2" pip install -U --force-reinstall pillow-simd
 """
 
+import argparse
 import json
 import os
 import subprocess
 import tempfile
-import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
+from numba import njit, prange
+import PIL
 from PIL import Image
 
+# Pillow-SIMD wheels carry a ".postN" version suffix
+if ".post" not in PIL.__version__:
+    print(f"⚠ Stock Pillow {PIL.__version__} detected — frames decode faster with Pillow-SIMD (see header)")
+
+from _ass_overlay import build_ass
+from _encoder import VIDEO_ENCODER, encoder_args
+
 # ── Configuration ─────────────────────────────────────────────
 CAMERA_PATH_FILE = os.path.abspath("./camera_path.json")
 FRAMES_DIR = os.path.abspath("./frames")
@@ -28,6 +47,23 @@ FPS = 24
 RES_X = 1920
 RES_Y = 960  # 2:1 equirectangular aspect ratio
 CROSSFADE_HALF = 1  # frames from each side of transition = 2-frame crossfade window
+DECODE_WORKERS = os.cpu_count()  # PNG decodes in flight ahead of the encoder
+
+parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+parser.add_argument("--device", default="cpu",
+                    help="where crossfades are blended: cpu (Numba) or a PyTorch "
+                         "device such as mps or cuda (default: cpu)")
+args = parser.parse_args()
+
+# Optional GPU blending; falls back to the Numba kernel if PyTorch is missing
+torch = None
+if args.device != "cpu":
+    try:
+        import torch
+        torch.empty(1, device=args.device)
+    except Exception as e:
+        print(f"⚠ PyTorch device '{args.device}' unavailable ({e}) — blending on CPU")
+        torch = None
 
 
 # ── Crossfade schedule computation ────────────────────────────
@@ -39,15 +75,12 @@ def compute_crossfade_schedule(path_frames, crossfade_half=2):
     where alpha=0.0 means pure A and alpha=1.0 means pure B.
     """
     # Build runs: consecutive animation frames showing the same geo frame
-    runs = []
-    prev_geo = path_frames[0]["geo_frame_idx"]
-    run_start = 0
-    for i, pf in enumerate(path_frames):
-        if pf["geo_frame_idx"] != prev_geo:
-            runs.append((prev_geo, run_start, i, i - run_start))
-            run_start = i
-            prev_geo = pf["geo_frame_idx"]
-    runs.append((prev_geo, run_start, len(path_frames), len(path_frames) - run_start))
+    # (run-length encoding over the geo index array)
+    geo = np.fromiter((pf["geo_frame_idx"] for pf in path_frames), dtype=np.int64,
+                      count=len(path_frames))
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(geo)) + 1, [len(geo)])).tolist()
+    runs = [(int(geo[start]), start, end, end - start)
+            for start, end in zip(bounds[:-1], bounds[1:])]
 
     # Build crossfade map
     crossfade_map = {}
@@ -86,187 +119,217 @@ crossfade_map = compute_crossfade_schedule(path_frames, CROSSFADE_HALF)
 n_geo_frames = len(set(pf["geo_frame_idx"] for pf in path_frames))
 print(f"  Crossfade frames: {len(crossfade_map)} (across {n_geo_frames - 1} transitions)")
 
-# ── Create temp directory with frames ─────────────────────────
-# Non-crossfade frames: symlink to source PNG
-# Crossfade frames: PIL-blended PNG saved to temp dir
-print(f"\nCreating frames (symlinks + crossfade blends)...")
-tmp_dir = tempfile.mkdtemp(prefix="flat_frames_")
-blend_start = time.time()
-
-# Image cache: keep only the 2 images needed for current crossfade
-image_cache = {}  # geo_idx -> PIL Image
-blend_count = 0
-
-for i, pf in enumerate(path_frames):
-    dst = os.path.join(tmp_dir, f"frame_{i + 1:04d}.png")
-
-    if i in crossfade_map:
-        geo_a, geo_b, alpha = crossfade_map[i]
-
-        # Load images into cache if not already there
-        if geo_a not in image_cache:
-            image_cache[geo_a] = Image.open(
-                os.path.join(FRAMES_DIR, f"globe_frame_{geo_a:04d}.png")
-            )
-        if geo_b not in image_cache:
-            image_cache[geo_b] = Image.open(
-                os.path.join(FRAMES_DIR, f"globe_frame_{geo_b:04d}.png")
-            )
-
-        # Alpha-blend between the two geological frames
-        blended = Image.blend(image_cache[geo_a], image_cache[geo_b], alpha)
-        blended.save(dst)
-        blend_count += 1
-
-        # Evict cache entries no longer needed (keep only current pair)
-        for cached_idx in list(image_cache.keys()):
-            if cached_idx != geo_a and cached_idx != geo_b:
-                del image_cache[cached_idx]
-    else:
-        # No crossfade — symlink to source PNG
-        geo_idx = pf["geo_frame_idx"]
-        src = os.path.join(FRAMES_DIR, f"globe_frame_{geo_idx:04d}.png")
-        os.symlink(src, dst)
-
-    # Progress reporting every 200 frames
-    if (i + 1) % 200 == 0:
-        elapsed = time.time() - blend_start
-        print(f"  [{i+1}/{total_frames}] {blend_count} blends so far ({elapsed:.1f}s)")
-
-# Clear image cache
-image_cache.clear()
-blend_elapsed = time.time() - blend_start
-print(f"  Created {total_frames} frames ({blend_count} crossfade blends in {blend_elapsed:.1f}s)")
-
 # ── Generate ASS subtitle file ────────────────────────────────
-# Same logic as render_globe.py but adjusted for 1920x960 resolution
+# Same overlay as render_globe.py, adjusted for 1920x960 resolution
 print(f"\nGenerating subtitle overlay...")
 
-ass_header = f"""[Script Info]
-Title: Tectonic Globe Flat Projection Overlay
-ScriptType: v4.00+
-WrapStyle: 0
-PlayResX: {RES_X}
-PlayResY: {RES_Y}
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: TimeLabel,Arial,44,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,-1,0,0,0,100,100,0,0,1,3,0,1,40,40,30,1
-Style: EraLabel,Arial,28,&H00CCCCCC,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,2,0,1,40,40,85,1
+n_events, rebuilt = build_ass(path_frames, RES_X, RES_Y, FPS, OVERLAY_SCRIPT,
+                              title="Tectonic Globe Flat Projection Overlay",
+                              time_size=44, era_size=28, time_margin=30, era_margin=85)
+print(f"  Subtitle file: {OVERLAY_SCRIPT} ({n_events} events{'' if rebuilt else ', unchanged'})")
+
+# ── Frame source ──────────────────────────────────────────────
+# Geo frames are decoded once into uint8 RGB arrays at output resolution
+# and streamed to ffmpeg as raw video — no intermediate PNGs and no
+# per-frame scale filter. Playback only moves forward, so a small cache
+# holds just the frames of the current transition.
+
+# Geo frames in first-use order; decoding runs ahead of playback on a
+# thread pool (Pillow releases the GIL inside the PNG decoder)
+decode_order = list(dict.fromkeys(pf["geo_frame_idx"] for pf in path_frames))
+decode_pos = {geo_idx: k for k, geo_idx in enumerate(decode_order)}
+decode_pool = ThreadPoolExecutor(max_workers=DECODE_WORKERS)
+pending = {}      # geo_idx -> Future of uint8 RGB array
+next_decode = 0   # position in decode_order of the next frame to submit
+
+image_cache = {}  # geo_idx -> uint8 RGB array
+blend_count = 0
 
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
 
+def decode_geo_frame(geo_idx):
+    """Decode a geo frame and Lanczos-resize it to RES_X x RES_Y (once per frame)."""
+    with Image.open(os.path.join(FRAMES_DIR, f"globe_frame_{geo_idx:04d}.png")) as im:
+        im = im.convert("RGB")
+        if im.size != (RES_X, RES_Y):
+            im = im.resize((RES_X, RES_Y), Image.LANCZOS)
+        return np.ascontiguousarray(im)
+
+
+def reset_frame_source():
+    """Drop cached/prefetched frames so playback can restart from frame 0."""
+    global next_decode
+    for future in pending.values():
+        future.cancel()
+    pending.clear()
+    image_cache.clear()
+    next_decode = 0
+
+
+def load_geo_frame(geo_idx):
+    """Decoded RGB array for a geo frame, keeping only the two most recent."""
+    global next_decode
+    if geo_idx not in image_cache:
+        # Keep DECODE_WORKERS frames decoding ahead of this one
+        horizon = min(len(decode_order), decode_pos[geo_idx] + 1 + DECODE_WORKERS)
+        while next_decode < horizon:
+            g = decode_order[next_decode]
+            pending[g] = decode_pool.submit(decode_geo_frame, g)
+            next_decode += 1
+        if len(image_cache) >= 2:
+            del image_cache[next(iter(image_cache))]
+        future = pending.pop(geo_idx, None)
+        image_cache[geo_idx] = future.result() if future else decode_geo_frame(geo_idx)
+    return image_cache[geo_idx]
+
+
+# Crossfade windows: every frame of one transition is blended in a single pass.
+# A window is a run of consecutive crossfade frames with the same source pair.
+window_weights = {}  # first anim frame of window -> 8.8 fixed-point weights, in frame order
+blend_slot = {}      # anim frame -> (first anim frame of its window, index into weights)
+for i in sorted(crossfade_map):
+    geo_a, geo_b, alpha = crossfade_map[i]
+    prev = crossfade_map.get(i - 1)
+    start = blend_slot[i - 1][0] if prev and prev[:2] == (geo_a, geo_b) else i
+    weights = window_weights.setdefault(start, [])
+    blend_slot[i] = (start, len(weights))
+    weights.append(int(round(alpha * 256)))
+window_weights = {start: np.array(w, dtype=np.int64) for start, w in window_weights.items()}
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def blend_u8(a, b, ia_fx, out):
+    """
+    8.8 fixed-point crossfades for every weight in ia_fx, reading a and b once:
+    out[k] = (a*(256-ia_fx[k]) + b*ia_fx[k]) >> 8, rows in parallel.
+    """
+    n = ia_fx.shape[0]
+    h, w, c = a.shape
+    for y in prange(h):
+        for x in range(w):
+            for ch in range(c):
+                av = np.uint16(a[y, x, ch])
+                bv = np.uint16(b[y, x, ch])
+                for k in range(n):
+                    out[k, y, x, ch] = (av * (256 - ia_fx[k]) + bv * ia_fx[k]) >> 8
+
+
+def blend_torch(a, b, ia_fx, out):
+    """Same 8.8 fixed-point crossfades as blend_u8, computed on args.device."""
+    ta = torch.from_numpy(a).to(args.device, torch.int32)
+    tb = torch.from_numpy(b).to(args.device, torch.int32)
+    w = torch.from_numpy(ia_fx).to(args.device, torch.int32).view(-1, 1, 1, 1)
+    blended = (ta * (256 - w) + tb * w) >> 8
+    out[:len(ia_fx)] = blended.to(torch.uint8).cpu().numpy()
+
+
+blend = blend_torch if torch is not None else blend_u8
+
+# Compile before the frame loop so the first crossfade doesn't pay for it
+_warm = np.zeros((1, 1, 3), dtype=np.uint8)
+blend_u8(_warm, _warm, np.array([128], dtype=np.int64), np.empty((1, 1, 1, 3), dtype=np.uint8))
+# Reused for every window; a window's frames are written out before the next one
+blend_out = np.empty((2 * CROSSFADE_HALF, RES_Y, RES_X, 3), dtype=np.uint8)
+
+
+def iter_frames():
+    """Yield the RGB array for every animation frame, blending crossfades."""
+    global blend_count
+    blend_count = 0
+    reset_frame_source()
+    for i, pf in enumerate(path_frames):
+        if i in crossfade_map:
+            geo_a, geo_b, alpha = crossfade_map[i]
+            start, slot = blend_slot[i]
+            if slot == 0:  # first frame of the window: blend all of it
+                blend(load_geo_frame(geo_a), load_geo_frame(geo_b),
+                      window_weights[start], blend_out)
+            yield blend_out[slot]
+            blend_count += 1
+        else:
+            yield load_geo_frame(pf["geo_frame_idx"])
 
-def frame_to_ass_time(frame_num, fps):
-    """Convert frame number to ASS timestamp (H:MM:SS.CC)."""
-    total_seconds = frame_num / fps
-    h = int(total_seconds // 3600)
-    m = int((total_seconds % 3600) // 60)
-    s = total_seconds % 60
-    return f"{h}:{m:02d}:{s:05.2f}"
-
-
-ass_events = []
-prev_time_ma = None
-prev_era = None
-block_start_frame = 0
-
-# Group consecutive frames with the same time_ma and era
-for pf in path_frames:
-    anim_f = pf["anim_frame"]
-    time_ma = pf["time_ma"]
-    era = pf.get("era_label", "")
-
-    if time_ma != prev_time_ma or era != prev_era:
-        # Close previous block
-        if prev_time_ma is not None:
-            start_ts = frame_to_ass_time(block_start_frame, FPS)
-            end_ts = frame_to_ass_time(anim_f, FPS)
-            time_str = f"{int(prev_time_ma)} Ma" if prev_time_ma == int(prev_time_ma) else f"{prev_time_ma:.1f} Ma"
-            ass_events.append(
-                f"Dialogue: 0,{start_ts},{end_ts},TimeLabel,,0,0,0,,{time_str}"
-            )
-            if prev_era:
-                ass_events.append(
-                    f"Dialogue: 0,{start_ts},{end_ts},EraLabel,,0,0,0,,{prev_era}"
-                )
-        block_start_frame = anim_f
-        prev_time_ma = time_ma
-        prev_era = era
-
-# Close final block
-if prev_time_ma is not None:
-    start_ts = frame_to_ass_time(block_start_frame, FPS)
-    end_ts = frame_to_ass_time(total_frames, FPS)
-    time_str = f"{int(prev_time_ma)} Ma"
-    ass_events.append(
-        f"Dialogue: 0,{start_ts},{end_ts},TimeLabel,,0,0,0,,{time_str}"
-    )
-    if prev_era:
-        ass_events.append(
-            f"Dialogue: 0,{start_ts},{end_ts},EraLabel,,0,0,0,,{prev_era}"
-        )
-
-with open(OVERLAY_SCRIPT, 'w') as f:
-    f.write(ass_header)
-    f.write("\n".join(ass_events))
-    f.write("\n")
-
-print(f"  Subtitle file: {OVERLAY_SCRIPT} ({len(ass_events)} events)")
 
 # ── Assemble MP4 with ffmpeg ──────────────────────────────────
-print(f"\nAssembling MP4: {OUTPUT_PATH}")
-start_time = time.time()
-
-ffmpeg_cmd = [
-    "ffmpeg", "-y",
-    "-framerate", str(FPS),
-    "-i", os.path.join(tmp_dir, "frame_%04d.png"),
-    "-vf", f"scale={RES_X}:{RES_Y}:flags=lanczos,ass={OVERLAY_SCRIPT}",
-    "-c:v", "libx264",
-    "-crf", "18",
-    "-pix_fmt", "yuv420p",
-    OUTPUT_PATH
-]
-
-result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
-
-if result.returncode == 0:
-    elapsed = time.time() - start_time
-    file_size = os.path.getsize(OUTPUT_PATH) / (1024 * 1024)
-    print(f"\n✓ Flat projection video complete!")
-    print(f"  Output: {OUTPUT_PATH}")
-    print(f"  Duration: {duration_sec:.1f}s ({total_frames} frames at {FPS}fps)")
-    print(f"  Resolution: {RES_X}×{RES_Y}")
-    print(f"  File size: {file_size:.1f} MB")
-    print(f"  Assembly time: {elapsed:.1f}s")
-    print(f"  Crossfade blends: {blend_count}")
-else:
-    print(f"\n✗ ffmpeg with subtitles failed: {result.stderr[:500]}")
-    print("  Trying without subtitles...")
-    ffmpeg_cmd_plain = [
-        "ffmpeg", "-y",
+def encode(video_filter, encoder):
+    """Stream all frames into ffmpeg as rawvideo. Returns (returncode, stderr)."""
+    ffmpeg_cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "rawvideo",
+        "-pixel_format", "rgb24",
+        "-video_size", f"{RES_X}x{RES_Y}",
         "-framerate", str(FPS),
-        "-i", os.path.join(tmp_dir, "frame_%04d.png"),
-        "-vf", f"scale={RES_X}:{RES_Y}:flags=lanczos",
-        "-c:v", "libx264",
-        "-crf", "18",
+        "-i", "-",
+        *(["-vf", video_filter] if video_filter else []),
+        *encoder_args(encoder),
         "-pix_fmt", "yuv420p",
         OUTPUT_PATH
     ]
-    result2 = subprocess.run(ffmpeg_cmd_plain, capture_output=True, text=True)
-    if result2.returncode == 0:
+    # stderr goes to a file so a chatty ffmpeg can't block on a full pipe
+    with tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE, stderr=err,
+                                bufsize=1 << 20)
+        frames_start = time.time()
+        frames = iter_frames()
+        fed = False
+        try:
+            for i, frame in enumerate(frames):
+                proc.stdin.write(frame.data)
+                # Progress reporting every 200 frames
+                if (i + 1) % 200 == 0:
+                    elapsed = time.time() - frames_start
+                    print(f"  [{i+1}/{total_frames}] {blend_count} blends so far ({elapsed:.1f}s)")
+            fed = True
+        except BrokenPipeError:
+            fed = True  # ffmpeg exited early; its stderr says why
+        finally:
+            frames.close()
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+            if not fed:
+                # Decoding or blending raised: don't leave ffmpeg running
+                proc.kill()
+                proc.wait()
+        returncode = proc.wait()
+        err.seek(0)
+        return returncode, err.read().decode(errors="replace")
+
+
+# Prefetch decodes may still be in flight if every encode attempt fails
+try:
+    print(f"\nAssembling MP4: {OUTPUT_PATH}")
+    print(f"  Encoder: {VIDEO_ENCODER}")
+    print(f"  Blend device: {args.device if torch is not None else 'cpu'}")
+    start_time = time.time()
+
+    returncode, stderr = encode(f"ass={OVERLAY_SCRIPT}", VIDEO_ENCODER)
+    if returncode != 0 and VIDEO_ENCODER != "libx264":
+        print(f"\n✗ {VIDEO_ENCODER} failed: {stderr[:500]}")
+        print("  Retrying with libx264...")
+        returncode, stderr = encode(f"ass={OVERLAY_SCRIPT}", "libx264")
+
+    if returncode == 0:
         elapsed = time.time() - start_time
         file_size = os.path.getsize(OUTPUT_PATH) / (1024 * 1024)
-        print(f"\n✓ Flat projection video complete (no overlay)!")
+        print(f"\n✓ Flat projection video complete!")
+        print(f"  Output: {OUTPUT_PATH}")
+        print(f"  Duration: {duration_sec:.1f}s ({total_frames} frames at {FPS}fps)")
+        print(f"  Resolution: {RES_X}×{RES_Y}")
         print(f"  File size: {file_size:.1f} MB")
+        print(f"  Assembly time: {elapsed:.1f}s")
+        print(f"  Crossfade blends: {blend_count}")
     else:
-        print(f"\n✗ ffmpeg failed: {result2.stderr[:500]}")
-        shutil.rmtree(tmp_dir)
-        raise SystemExit(1)
-
-# ── Cleanup ───────────────────────────────────────────────────
-shutil.rmtree(tmp_dir)
-print(f"  Cleaned up temp directory")
+        print(f"\n✗ ffmpeg with subtitles failed: {stderr[:500]}")
+        print("  Trying without subtitles...")
+        returncode, stderr = encode(None, "libx264")
+        if returncode == 0:
+            elapsed = time.time() - start_time
+            file_size = os.path.getsize(OUTPUT_PATH) / (1024 * 1024)
+            print(f"\n✓ Flat projection video complete (no overlay)!")
+            print(f"  File size: {file_size:.1f} MB")
+        else:
+            print(f"\n✗ ffmpeg failed: {stderr[:500]}")
+            raise SystemExit(1)
+finally:
+    decode_pool.shutdown(cancel_futures=True)
@@ -16,10 +16,19 @@ Usage:
 
 import bpy
 import os
-import glob
+import sys
 import json
 import math
 
+import numpy as np  # bundled with Blender
+
+# Blender doesn't put the script's directory on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _ass_overlay import build_ass
+from _encoder import VIDEO_ENCODER, encoder_args
+from _globe_scene import list_frames, eevee_engine_id
+from _render_format import RENDER_FORMAT, FORMAT_EXT, apply_render_format
+
 # ── Configuration ──────────────────────────────────────────────
 FRAMES_DIR = os.path.abspath("./frames")
 CAMERA_PATH_FILE = os.path.abspath("./camera_path.json")
@@ -37,6 +46,9 @@ FPS = 24
 # Cycles settings (ignored if USE_EEVEE)
 CYCLES_SAMPLES = 64
 CYCLES_DEVICE = 'GPU'  # 'GPU' or 'CPU'
+CYCLES_ADAPTIVE_THRESHOLD = 0.01  # stop sampling a pixel once its noise is below this
+CYCLES_MIN_SAMPLES = 16           # adaptive sampling never stops before this
+CYCLES_DENOISE = True             # OpenImageDenoise on the final frame
 
 # Globe
 SPHERE_RADIUS = 2.0
@@ -60,11 +72,18 @@ path_frames = camera_path["frames"]
 total_anim_frames = len(path_frames)
 meta = camera_path["metadata"]
 
+# Globe rotation per frame (Y tilt for latitude, Z spin for longitude),
+# converted for the whole path up front
+rot_y_all = -np.radians(np.fromiter((pf["camera_lat"] for pf in path_frames),
+                                    dtype=np.float64, count=total_anim_frames)).tolist()
+rot_z_all = -np.radians(np.fromiter((pf["camera_lon"] for pf in path_frames),
+                                    dtype=np.float64, count=total_anim_frames)).tolist()
+
 print(f"Camera path loaded: {total_anim_frames} animation frames")
 print(f"  {meta['time_range']}, {meta['pacing']}")
 
 # ── Discover texture frames ───────────────────────────────────
-frame_files = sorted(glob.glob(os.path.join(FRAMES_DIR, "globe_frame_*.png")))
+frame_files = list_frames(FRAMES_DIR)
 geo_frame_count = len(frame_files)
 
 if geo_frame_count == 0:
@@ -82,12 +101,18 @@ scene.render.fps = FPS
 
 # ── Renderer configuration ────────────────────────────────────
 if USE_EEVEE:
-    scene.render.engine = 'BLENDER_EEVEE'
-    print("Renderer: EEVEE Next")
+    scene.render.engine = eevee_engine_id()
+    print(f"Renderer: EEVEE ({scene.render.engine})")
 else:
     scene.render.engine = 'CYCLES'
     scene.cycles.device = CYCLES_DEVICE
     scene.cycles.samples = CYCLES_SAMPLES
+    scene.cycles.use_adaptive_sampling = True
+    scene.cycles.adaptive_threshold = CYCLES_ADAPTIVE_THRESHOLD
+    scene.cycles.adaptive_min_samples = CYCLES_MIN_SAMPLES
+    scene.cycles.use_denoising = CYCLES_DENOISE
+    if CYCLES_DENOISE:
+        scene.cycles.denoiser = 'OPENIMAGEDENOISE'
 
     try:
         prefs = bpy.context.preferences.addons['cycles'].preferences
@@ -107,10 +132,12 @@ scene.render.resolution_x = RES_X
 scene.render.resolution_y = RES_Y
 scene.render.resolution_percentage = 100
 
-# Render individual PNGs, then assemble with ffmpeg
+# Render individual frames, then assemble with ffmpeg
 RENDER_DIR = os.path.abspath("./render_frames")
 os.makedirs(RENDER_DIR, exist_ok=True)
-scene.render.image_settings.file_format = 'PNG'
+# Every frame is re-rendered, so always the configured intermediate format
+RENDER_EXT = FORMAT_EXT[RENDER_FORMAT]
+apply_render_format(scene.render.image_settings, RENDER_FORMAT)
 scene.render.image_settings.color_mode = 'RGB'
 
 print(f"Output: {RENDER_DIR}/ ({RES_X}x{RES_Y} @ {FPS}fps, {total_anim_frames} frames)")
@@ -252,15 +279,13 @@ def compute_crossfade_schedule(path_frames, crossfade_half=2):
     Returns dict: anim_frame_index -> (geo_idx_a, geo_idx_b, alpha)
     where alpha=0.0 means pure A and alpha=1.0 means pure B.
     """
-    runs = []
-    prev_geo = path_frames[0]["geo_frame_idx"]
-    run_start = 0
-    for i, pf in enumerate(path_frames):
-        if pf["geo_frame_idx"] != prev_geo:
-            runs.append((prev_geo, run_start, i, i - run_start))
-            run_start = i
-            prev_geo = pf["geo_frame_idx"]
-    runs.append((prev_geo, run_start, len(path_frames), len(path_frames) - run_start))
+    # Build runs: consecutive animation frames showing the same geo frame
+    # (run-length encoding over the geo index array)
+    geo = np.fromiter((pf["geo_frame_idx"] for pf in path_frames), dtype=np.int64,
+                      count=len(path_frames))
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(geo)) + 1, [len(geo)])).tolist()
+    runs = [(int(geo[start]), start, end, end - start)
+            for start, end in zip(bounds[:-1], bounds[1:])]
 
     crossfade_map = {}
     for ri in range(len(runs) - 1):
@@ -280,6 +305,59 @@ def compute_crossfade_schedule(path_frames, crossfade_half=2):
 
 crossfade_map = compute_crossfade_schedule(path_frames, CROSSFADE_HALF)
 
+# ── Text overlay (ASS subtitles) ─────────────────────────────
+# Per-frame time/era text as an ASS subtitle file, generated before
+# rendering so the streaming encoder can burn it in
+print(f"\nGenerating text overlay data...")
+
+OVERLAY_SCRIPT = os.path.abspath("./overlay_text.ass")
+
+n_events, rebuilt = build_ass(path_frames, RES_X, RES_Y, FPS, OVERLAY_SCRIPT)
+print(f"  Subtitle file: {OVERLAY_SCRIPT} ({n_events} events{'' if rebuilt else ', unchanged'})")
+
+# ── Encoder ───────────────────────────────────────────────────
+# ffmpeg runs alongside Blender: each frame's image is piped to it as soon as
+# it is rendered, so encoding overlaps rendering instead of following it.
+# The frames stay on disk for the resume scripts and the fallback assembly.
+import subprocess
+import tempfile
+import time
+
+
+def assemble(encoder, overlay=True):
+    ffmpeg_cmd = [
+        "ffmpeg", "-y",
+        "-framerate", str(FPS),
+        "-i", os.path.join(RENDER_DIR, f"render_%04d{RENDER_EXT}"),
+        *(["-vf", f"ass={OVERLAY_SCRIPT}"] if overlay else []),
+        *encoder_args(encoder),
+        "-pix_fmt", "yuv420p",
+        OUTPUT_PATH
+    ]
+    return subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+
+
+def start_stream_encoder(encoder):
+    ffmpeg_cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "image2pipe",
+        "-framerate", str(FPS),
+        "-i", "-",
+        "-vf", f"ass={OVERLAY_SCRIPT}",
+        *encoder_args(encoder),
+        "-pix_fmt", "yuv420p",
+        OUTPUT_PATH
+    ]
+    # stderr goes to a file so a chatty ffmpeg can't block on a full pipe
+    err = tempfile.TemporaryFile()
+    proc = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE, stderr=err, bufsize=1 << 20)
+    return proc, err
+
+
+stream_enc, stream_err = start_stream_encoder(VIDEO_ENCODER)
+stream_ok = True
+print(f"Streaming encoder: {VIDEO_ENCODER} → {OUTPUT_PATH}")
+
 # ── Per-frame render loop ─────────────────────────────────────
 # Blender's image sequence frame_offset keyframing is broken in 5.0.
 # Instead, we explicitly load the correct texture and set globe rotation
@@ -294,9 +372,6 @@ print(f"Crossfade frames: {len(crossfade_map)} (across {geo_frame_count - 1} tra
 print(f"Render dir: {RENDER_DIR}")
 print(f"{'='*60}\n")
 
-import subprocess
-import time
-
 render_start = time.time()
 prev_geo_a = -1
 prev_geo_b = -1
@@ -304,15 +379,10 @@ prev_geo_b = -1
 for i, pf in enumerate(path_frames):
     anim_f = pf["anim_frame"] + 1  # Blender 1-indexed
     geo_idx = pf["geo_frame_idx"]
-    cam_lon = pf["camera_lon"]
-    cam_lat = pf["camera_lat"]
     time_ma = pf["time_ma"]
 
     # Set globe rotation so cam_lon/cam_lat faces the camera
-    # Y-axis tilt for latitude, Z-axis spin for longitude
-    rot_y = -math.radians(cam_lat)
-    rot_z = -math.radians(cam_lon)
-    globe.rotation_euler = (0, rot_y, rot_z)
+    globe.rotation_euler = (0, rot_y_all[i], rot_z_all[i])
 
     if i in crossfade_map:
         # ── Crossfade frame: blend two textures ──
@@ -356,6 +426,15 @@ for i, pf in enumerate(path_frames):
     scene.render.filepath = os.path.join(RENDER_DIR, f"render_{anim_f:04d}")
     bpy.ops.render.render(write_still=True)
 
+    # Hand the finished frame to the encoder
+    if stream_ok:
+        try:
+            with open(scene.render.filepath + RENDER_EXT, 'rb') as f:
+                stream_enc.stdin.write(f.read())
+        except BrokenPipeError:
+            stream_ok = False
+            print("  ⚠ Streaming encoder exited early; will assemble from disk after rendering")
+
     # Progress reporting
     elapsed = time.time() - render_start
     fps_rate = (i + 1) / elapsed if elapsed > 0 else 0
@@ -367,117 +446,37 @@ for i, pf in enumerate(path_frames):
 render_elapsed = time.time() - render_start
 print(f"\n✓ Frames rendered in {render_elapsed:.0f}s ({total_anim_frames / render_elapsed:.2f} fps)")
 
-# ── Assemble MP4 with ffmpeg + text overlay ──────────────────
-# Step 1: Build per-frame text overlay using ffmpeg drawtext with textfile
-# Generate a subtitle file (ASS format) for precise per-frame text
-print(f"\nGenerating text overlay data...")
-
-OVERLAY_SCRIPT = os.path.abspath("./overlay_text.ass")
-
-# Build ASS subtitle file for time + era overlay
-ass_header = """[Script Info]
-Title: Tectonic Globe Overlay
-ScriptType: v4.00+
-WrapStyle: 0
-PlayResX: 1920
-PlayResY: 1080
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: TimeLabel,Arial,48,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,-1,0,0,0,100,100,0,0,1,3,0,1,40,40,35,1
-Style: EraLabel,Arial,32,&H00CCCCCC,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,2,0,1,40,40,95,1
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
-
-def frame_to_ass_time(frame_num, fps):
-    """Convert frame number to ASS timestamp (H:MM:SS.CC)."""
-    total_seconds = frame_num / fps
-    h = int(total_seconds // 3600)
-    m = int((total_seconds % 3600) // 60)
-    s = total_seconds % 60
-    return f"{h}:{m:02d}:{s:05.2f}"
-
-ass_events = []
-prev_time_ma = None
-prev_era = None
-block_start_frame = 0
-
-# Group consecutive frames with the same time_ma and era
-for pf in path_frames:
-    anim_f = pf["anim_frame"]
-    time_ma = pf["time_ma"]
-    era = pf.get("era_label", "")
-
-    if time_ma != prev_time_ma or era != prev_era:
-        # Close previous block
-        if prev_time_ma is not None:
-            start_ts = frame_to_ass_time(block_start_frame, FPS)
-            end_ts = frame_to_ass_time(anim_f, FPS)
-            time_str = f"{int(prev_time_ma)} Ma" if prev_time_ma == int(prev_time_ma) else f"{prev_time_ma:.1f} Ma"
-            ass_events.append(
-                f"Dialogue: 0,{start_ts},{end_ts},TimeLabel,,0,0,0,,{time_str}"
-            )
-            if prev_era:
-                ass_events.append(
-                    f"Dialogue: 0,{start_ts},{end_ts},EraLabel,,0,0,0,,{prev_era}"
-                )
-        block_start_frame = anim_f
-        prev_time_ma = time_ma
-        prev_era = era
-
-# Close final block
-if prev_time_ma is not None:
-    start_ts = frame_to_ass_time(block_start_frame, FPS)
-    end_ts = frame_to_ass_time(total_anim_frames, FPS)
-    time_str = f"{int(prev_time_ma)} Ma"
-    ass_events.append(
-        f"Dialogue: 0,{start_ts},{end_ts},TimeLabel,,0,0,0,,{time_str}"
-    )
-    if prev_era:
-        ass_events.append(
-            f"Dialogue: 0,{start_ts},{end_ts},EraLabel,,0,0,0,,{prev_era}"
-        )
-
-with open(OVERLAY_SCRIPT, 'w') as f:
-    f.write(ass_header)
-    f.write("\n".join(ass_events))
-    f.write("\n")
-
-print(f"  Subtitle file: {OVERLAY_SCRIPT} ({len(ass_events)} events)")
-
-# Step 2: Assemble frames into MP4 with subtitle overlay
-print(f"\nAssembling MP4 with overlay: {OUTPUT_PATH}")
-ffmpeg_cmd = [
-    "ffmpeg", "-y",
-    "-framerate", str(FPS),
-    "-i", os.path.join(RENDER_DIR, "render_%04d.png"),
-    "-vf", f"ass={OVERLAY_SCRIPT}",
-    "-c:v", "libx264",
-    "-crf", "18",
-    "-pix_fmt", "yuv420p",
-    OUTPUT_PATH
-]
-result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
-if result.returncode == 0:
+# ── Finish MP4 ────────────────────────────────────────────────
+try:
+    stream_enc.stdin.close()
+except BrokenPipeError:
+    stream_ok = False
+stream_ok = stream_enc.wait() == 0 and stream_ok
+stream_err.seek(0)
+stream_msg = stream_err.read().decode(errors="replace")
+stream_err.close()
+
+if stream_ok:
     print(f"\n✓ Render complete! Output: {OUTPUT_PATH}")
     print(f"  Duration: {duration_sec:.1f}s ({total_anim_frames} frames at {FPS}fps)")
 else:
-    print(f"\n✗ ffmpeg with subtitles failed: {result.stderr}")
-    print("  Falling back to plain assembly...")
-    ffmpeg_cmd_plain = [
-        "ffmpeg", "-y",
-        "-framerate", str(FPS),
-        "-i", os.path.join(RENDER_DIR, "render_%04d.png"),
-        "-c:v", "libx264",
-        "-crf", "18",
-        "-pix_fmt", "yuv420p",
-        OUTPUT_PATH
-    ]
-    result2 = subprocess.run(ffmpeg_cmd_plain, capture_output=True, text=True)
-    if result2.returncode == 0:
-        print(f"\n✓ Render complete (no overlay): {OUTPUT_PATH}")
+    # Fall back to assembling the rendered PNGs from disk
+    print(f"\n✗ Streaming encode failed: {stream_msg}")
+    print(f"\nAssembling MP4 with overlay from {RENDER_DIR}...")
+    result = assemble(VIDEO_ENCODER)
+    if result.returncode != 0 and VIDEO_ENCODER != "libx264":
+        print(f"\n✗ {VIDEO_ENCODER} failed: {result.stderr}")
+        print("  Retrying with libx264...")
+        result = assemble("libx264")
+    if result.returncode == 0:
+        print(f"\n✓ Render complete! Output: {OUTPUT_PATH}")
+        print(f"  Duration: {duration_sec:.1f}s ({total_anim_frames} frames at {FPS}fps)")
     else:
-        print(f"\n✗ ffmpeg failed: {result2.stderr}")
-        raise SystemExit(1)
+        print(f"\n✗ ffmpeg with subtitles failed: {result.stderr}")
+        print("  Falling back to plain assembly...")
+        result2 = assemble("libx264", overlay=False)
+        if result2.returncode == 0:
+            print(f"\n✓ Render complete (no overlay): {OUTPUT_PATH}")
+        else:
+            print(f"\n✗ ffmpeg failed: {result2.stderr}")
+            raise SystemExit(1)
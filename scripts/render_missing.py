@@ -5,15 +5,22 @@ Render only specific missing frames to fill gaps in render_frames/.
 
 import bpy
 import os
-import glob
+import sys
 import json
 import math
 import time
 
+# Blender doesn't put the script's directory on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _globe_scene import list_frames
+from _render_format import apply_render_format, detect_render_format
+
 # ── Configuration (must match render_globe.py) ────────────────
 FRAMES_DIR = os.path.abspath("./frames")
 CAMERA_PATH_FILE = os.path.abspath("./camera_path.json")
 RENDER_DIR = os.path.abspath("./render_frames")
+# Fill gaps in the format the surrounding frames were rendered in
+RENDER_FORMAT = detect_render_format(RENDER_DIR)
 
 USE_EEVEE = False
 RES_X = 1920
@@ -21,6 +28,9 @@ RES_Y = 1080
 FPS = 24
 CYCLES_SAMPLES = 64
 CYCLES_DEVICE = 'GPU'
+CYCLES_ADAPTIVE_THRESHOLD = 0.01  # stop sampling a pixel once its noise is below this
+CYCLES_MIN_SAMPLES = 16           # adaptive sampling never stops before this
+CYCLES_DENOISE = True             # OpenImageDenoise on the final frame
 
 SPHERE_RADIUS = 2.0
 SPHERE_SEGMENTS = 128
@@ -38,7 +48,7 @@ with open(CAMERA_PATH_FILE, 'r') as f:
 path_frames = camera_path["frames"]
 total_anim_frames = len(path_frames)
 
-frame_files = sorted(glob.glob(os.path.join(FRAMES_DIR, "globe_frame_*.png")))
+frame_files = list_frames(FRAMES_DIR)
 geo_frame_count = len(frame_files)
 
 print(f"Rendering {len(MISSING_FRAMES)} missing frames: {MISSING_FRAMES}")
@@ -53,6 +63,12 @@ scene.render.fps = FPS
 scene.render.engine = 'CYCLES'
 scene.cycles.device = CYCLES_DEVICE
 scene.cycles.samples = CYCLES_SAMPLES
+scene.cycles.use_adaptive_sampling = True
+scene.cycles.adaptive_threshold = CYCLES_ADAPTIVE_THRESHOLD
+scene.cycles.adaptive_min_samples = CYCLES_MIN_SAMPLES
+scene.cycles.use_denoising = CYCLES_DENOISE
+if CYCLES_DENOISE:
+    scene.cycles.denoiser = 'OPENIMAGEDENOISE'
 try:
     prefs = bpy.context.preferences.addons['cycles'].preferences
     prefs.compute_device_type = 'METAL'
@@ -67,7 +83,7 @@ except Exception as e:
 scene.render.resolution_x = RES_X
 scene.render.resolution_y = RES_Y
 scene.render.resolution_percentage = 100
-scene.render.image_settings.file_format = 'PNG'
+apply_render_format(scene.render.image_settings, RENDER_FORMAT)
 scene.render.image_settings.color_mode = 'RGB'
 
 # Globe
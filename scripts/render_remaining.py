@@ -1,22 +1,51 @@
 #!/usr/bin/env python3
 """
 Resume render: picks up from where render_globe.py left off.
-Renders only missing frames, then assembles the final MP4.
+Renders only missing frames, streaming every frame into ffmpeg in
+animation order as soon as it is available.
+
+Usage:
+    /Applications/Blender.app/Contents/MacOS/Blender --background --python scripts/render_remaining.py
+    /Applications/Blender.app/Contents/MacOS/Blender --background --python scripts/render_remaining.py -- --serve
+    /Applications/Blender.app/Contents/MacOS/Blender --background --python scripts/render_remaining.py -- --direct
+
+With --serve the scene stays loaded after the missing frames are done, and
+each line on stdin names another animation frame (1-indexed) to render,
+until EOF. This way re-renders don't pay for scene setup again. A served
+frame can replace one that is already encoded, so serve mode doesn't stream:
+the MP4 is assembled from disk at EOF.
+
+With --direct, and only when no frames have been rendered yet, Blender
+encodes the MP4 itself from the render buffer, so no per-frame images are
+written. The render can't be resumed, so use it for a final pass.
 """
 
 import bpy
 import os
-import glob
 import json
 import math
 import subprocess
+import sys
+import tempfile
 import time
+from collections import OrderedDict
+
+import numpy as np  # bundled with Blender
+
+# Blender doesn't put the script's directory on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _encoder import VIDEO_ENCODER, encoder_args
+from _globe_scene import list_frames, eevee_engine_id
+from _render_format import FORMAT_EXT, apply_render_format, detect_render_format
 
 # ── Configuration (must match render_globe.py) ────────────────
 FRAMES_DIR = os.path.abspath("./frames")
 CAMERA_PATH_FILE = os.path.abspath("./camera_path.json")
 OUTPUT_PATH = os.path.abspath("./tectonic_globe.mp4")
 RENDER_DIR = os.path.abspath("./render_frames")
+# Continue in the format the interrupted render used, so its frames count
+RENDER_FORMAT = detect_render_format(RENDER_DIR)
+RENDER_EXT = FORMAT_EXT[RENDER_FORMAT]
 
 USE_EEVEE = False
 RES_X = 1920
@@ -24,6 +53,9 @@ RES_Y = 1080
 FPS = 24
 CYCLES_SAMPLES = 64
 CYCLES_DEVICE = 'GPU'
+CYCLES_ADAPTIVE_THRESHOLD = 0.01  # stop sampling a pixel once its noise is below this
+CYCLES_MIN_SAMPLES = 16           # adaptive sampling never stops before this
+CYCLES_DENOISE = True             # OpenImageDenoise on the final frame
 
 SPHERE_RADIUS = 2.0
 SPHERE_SEGMENTS = 128
@@ -31,6 +63,63 @@ SPHERE_RINGS = 64
 CAMERA_DISTANCE = 8.0
 CAMERA_ELEVATION = 10
 
+PROGRESS_EVERY = 10  # frames between progress lines (plus each new geo frame)
+IMAGE_CACHE_SIZE = 16  # geo textures kept loaded; bounds VRAM use
+
+# Script arguments follow Blender's own after "--"
+SCRIPT_ARGS = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+SERVE = "--serve" in SCRIPT_ARGS
+DIRECT = "--direct" in SCRIPT_ARGS and not SERVE
+
+# ── Encoder ───────────────────────────────────────────────────
+def assemble(encoder):
+    """Encode the MP4 from the rendered frames on disk."""
+    ffmpeg_cmd = [
+        "ffmpeg", "-y",
+        "-framerate", str(FPS),
+        "-i", os.path.join(RENDER_DIR, f"render_%04d{RENDER_EXT}"),
+        *encoder_args(encoder),
+        "-pix_fmt", "yuv420p",
+        OUTPUT_PATH
+    ]
+    return subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+
+
+def start_stream_encoder(encoder):
+    ffmpeg_cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "image2pipe",
+        "-framerate", str(FPS),
+        "-i", "-",
+        *encoder_args(encoder, sliced=True),
+        "-pix_fmt", "yuv420p",
+        OUTPUT_PATH
+    ]
+    # stderr goes to a file so a chatty ffmpeg can't block on a full pipe
+    err = tempfile.TemporaryFile()
+    proc = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE, stderr=err, bufsize=1 << 20)
+    return proc, err
+
+
+def feed_encoder():
+    """Pipe every frame that is ready, in animation order, up to the first gap."""
+    global next_stream_frame, stream_ok
+    while stream_ok and next_stream_frame in ready:
+        path = os.path.join(RENDER_DIR, f"render_{next_stream_frame:04d}{RENDER_EXT}")
+        try:
+            with open(path, 'rb') as f:
+                stream_enc.stdin.write(f.read())
+        except BrokenPipeError:
+            stream_ok = False
+            print("  ⚠ Streaming encoder exited early; will assemble from disk after rendering")
+            return
+        next_stream_frame += 1
+
+
+stream_enc = None
+stream_ok = False
+direct_output = False
+
 # ── Load data ─────────────────────────────────────────────────
 with open(CAMERA_PATH_FILE, 'r') as f:
     camera_path = json.load(f)
@@ -38,23 +127,38 @@ with open(CAMERA_PATH_FILE, 'r') as f:
 path_frames = camera_path["frames"]
 total_anim_frames = len(path_frames)
 
-frame_files = sorted(glob.glob(os.path.join(FRAMES_DIR, "globe_frame_*.png")))
+# Globe rotation per frame (Y tilt for latitude, Z spin for longitude),
+# converted for the whole path up front
+rot_y_all = -np.radians(np.fromiter((pf["camera_lat"] for pf in path_frames),
+                                    dtype=np.float64, count=total_anim_frames)).tolist()
+rot_z_all = -np.radians(np.fromiter((pf["camera_lon"] for pf in path_frames),
+                                    dtype=np.float64, count=total_anim_frames)).tolist()
+
+frame_files = list_frames(FRAMES_DIR)
 geo_frame_count = len(frame_files)
 
 # Find which frames are already rendered
 existing = set()
-for fn in os.listdir(RENDER_DIR):
-    if fn.startswith("render_") and fn.endswith(".png"):
-        try:
-            num = int(fn.replace("render_", "").replace(".png", ""))
-            existing.add(num)
-        except ValueError:
-            pass
+prefix_len, ext_len = len("render_"), len(RENDER_EXT)
+with os.scandir(RENDER_DIR) as entries:
+    for entry in entries:
+        fn = entry.name
+        if fn.startswith("render_") and fn.endswith(RENDER_EXT):
+            try:
+                existing.add(int(fn[prefix_len:-ext_len]))
+            except ValueError:
+                pass
 
+existing = frozenset(existing)
+# path_frames is in animation order, so remaining is too
 remaining = [pf for pf in path_frames if (pf["anim_frame"] + 1) not in existing]
-print(f"Total frames: {total_anim_frames}, already rendered: {len(existing)}, remaining: {len(remaining)}")
+print(f"Total frames: {total_anim_frames}, already rendered: {len(existing)}, remaining: {len(remaining)} "
+      f"({RENDER_FORMAT} frames)")
 
-if len(remaining) == 0:
+if DIRECT and existing:
+    print("⚠ --direct needs an empty render dir; resuming with per-frame images instead")
+
+if len(remaining) == 0 and not SERVE:
     print("All frames already rendered! Jumping to MP4 assembly.")
 else:
     # ── Scene setup (identical to render_globe.py) ────────────
@@ -65,11 +169,17 @@ else:
     scene.render.fps = FPS
 
     if USE_EEVEE:
-        scene.render.engine = 'BLENDER_EEVEE_NEXT'
+        scene.render.engine = eevee_engine_id()
     else:
         scene.render.engine = 'CYCLES'
         scene.cycles.device = CYCLES_DEVICE
         scene.cycles.samples = CYCLES_SAMPLES
+        scene.cycles.use_adaptive_sampling = True
+        scene.cycles.adaptive_threshold = CYCLES_ADAPTIVE_THRESHOLD
+        scene.cycles.adaptive_min_samples = CYCLES_MIN_SAMPLES
+        scene.cycles.use_denoising = CYCLES_DENOISE
+        if CYCLES_DENOISE:
+            scene.cycles.denoiser = 'OPENIMAGEDENOISE'
         try:
             prefs = bpy.context.preferences.addons['cycles'].preferences
             prefs.compute_device_type = 'METAL'
@@ -84,7 +194,7 @@ else:
     scene.render.resolution_x = RES_X
     scene.render.resolution_y = RES_Y
     scene.render.resolution_percentage = 100
-    scene.render.image_settings.file_format = 'PNG'
+    apply_render_format(scene.render.image_settings, RENDER_FORMAT)
     scene.render.image_settings.color_mode = 'RGB'
 
     # Globe
@@ -117,8 +227,23 @@ else:
     output_node = nodes.new('ShaderNodeOutputMaterial')
     output_node.location = (300, 0)
 
-    img = bpy.data.images.load(frame_files[0])
-    tex_image.image = img
+    # Loaded textures, most recently used last. Only the least recently used
+    # is ever removed, never the one currently assigned.
+    image_cache = OrderedDict()
+
+    def load_texture(geo_idx):
+        img = image_cache.get(geo_idx)
+        if img is None:
+            img = bpy.data.images.load(frame_files[geo_idx], check_existing=True)
+            image_cache[geo_idx] = img
+            if len(image_cache) > IMAGE_CACHE_SIZE:
+                _, evicted = image_cache.popitem(last=False)
+                bpy.data.images.remove(evicted)
+        else:
+            image_cache.move_to_end(geo_idx)
+        return img
+
+    tex_image.image = load_texture(0)
 
     links.new(tex_coord.outputs['UV'], tex_image.inputs['Vector'])
     links.new(tex_image.outputs['Color'], bsdf.inputs['Base Color'])
@@ -166,59 +291,155 @@ else:
         bg_node.inputs['Color'].default_value = (0.005, 0.005, 0.02, 1.0)
         bg_node.inputs['Strength'].default_value = 1.0
 
+    # ── Streaming encoder ─────────────────────────────────────
+    # Frames are piped to ffmpeg in animation order while Blender renders:
+    # already-rendered frames go in up front, new ones as soon as every
+    # frame before them exists. The files stay on disk for further resumes.
+    # Serve mode re-renders frames after they've been piped, so it skips the
+    # stream and assembles from disk instead.
+    ready = set(existing)
+    next_stream_frame = 1
+    direct_render = DIRECT and not existing
+    if not (SERVE or direct_render):
+        stream_enc, stream_err = start_stream_encoder(VIDEO_ENCODER)
+        stream_ok = True
+        feed_encoder()
+        print(f"Streaming encoder: {VIDEO_ENCODER} → {OUTPUT_PATH}")
+
     # ── Render remaining frames ───────────────────────────────
+    # Each contiguous range of missing frames is one animation render, so
+    # Cycles keeps its device context and scene data between frames. A
+    # frame_change_pre handler poses the globe and swaps the texture; a
+    # render_write handler passes each written frame to the encoder.
     print(f"\nRendering {len(remaining)} remaining frames...")
     render_start = time.time()
+    rendered_count = 0
     prev_geo_idx = -1
 
-    for i, pf in enumerate(remaining):
-        anim_f = pf["anim_frame"] + 1
+    # Handlers change scene data mid-render; lock the UI side of it
+    scene.render.use_lock_interface = True
+
+    def pose_frame(anim_f):
+        globe.rotation_euler = (0, rot_y_all[anim_f - 1], rot_z_all[anim_f - 1])
+        img = load_texture(path_frames[anim_f - 1]["geo_frame_idx"])
+        if tex_image.image != img:
+            tex_image.image = img
+
+    @bpy.app.handlers.persistent
+    def on_frame_change(scene, *args):
+        pose_frame(scene.frame_current)
+
+    def on_frame_written(scene, *args):
+        global rendered_count, prev_geo_idx
+        anim_f = scene.frame_current
+        ready.add(anim_f)
+        feed_encoder()
+
+        rendered_count += 1
+        pf = path_frames[anim_f - 1]
         geo_idx = pf["geo_frame_idx"]
-        cam_lon = pf["camera_lon"]
-        cam_lat = pf["camera_lat"]
-        time_ma = pf["time_ma"]
-
-        rot_y = -math.radians(cam_lat)
-        rot_z = -math.radians(cam_lon)
-        globe.rotation_euler = (0, rot_y, rot_z)
-
-        if geo_idx != prev_geo_idx:
-            old_img = tex_image.image
-            new_img = bpy.data.images.load(frame_files[geo_idx], check_existing=True)
-            tex_image.image = new_img
-            if old_img and old_img != new_img:
-                bpy.data.images.remove(old_img)
-            prev_geo_idx = geo_idx
-
-        scene.frame_set(anim_f)
+        new_geo = geo_idx != prev_geo_idx
+        prev_geo_idx = geo_idx
+        if new_geo or rendered_count % PROGRESS_EVERY == 0 or rendered_count == len(remaining):
+            elapsed = time.time() - render_start
+            fps_rate = rendered_count / elapsed if elapsed > 0 else 0
+            eta = (len(remaining) - rendered_count) / fps_rate if fps_rate > 0 else 0
+            print(f"  [{rendered_count}/{len(remaining)}] Frame {anim_f}: {pf['time_ma']:.0f} Ma "
+                  f"(geo #{geo_idx}) — {fps_rate:.2f} fps, ETA {eta:.0f}s")
+
+    bpy.app.handlers.frame_change_pre.append(on_frame_change)
+
+    def render_frame(pf):
+        """Render one camera-path frame to disk and hand it to the encoder."""
+        anim_f = pf["anim_frame"] + 1
+        scene.frame_set(anim_f)  # poses the globe via on_frame_change
         scene.render.filepath = os.path.join(RENDER_DIR, f"render_{anim_f:04d}")
         bpy.ops.render.render(write_still=True)
+        ready.add(anim_f)
+        feed_encoder()
 
-        elapsed = time.time() - render_start
-        fps_rate = (i + 1) / elapsed if elapsed > 0 else 0
-        eta = (len(remaining) - i - 1) / fps_rate if fps_rate > 0 else 0
-        print(f"  [{i+1}/{len(remaining)}] Frame {anim_f}: {time_ma:.0f} Ma (geo #{geo_idx}) "
-              f"— {fps_rate:.2f} fps, ETA {eta:.0f}s")
+    # Contiguous [first, last] runs of missing anim frames (1-indexed)
+    ranges = []
+    for anim_f in (pf["anim_frame"] + 1 for pf in remaining):
+        if ranges and anim_f == ranges[-1][1] + 1:
+            ranges[-1][1] = anim_f
+        else:
+            ranges.append([anim_f, anim_f])
+
+    bpy.app.handlers.render_write.append(on_frame_written)
+    if direct_render:
+        # Fresh render with --direct: Blender's own FFmpeg writer encodes
+        # straight from the render buffer, no intermediate images
+        scene.render.image_settings.file_format = 'FFMPEG'
+        scene.render.ffmpeg.format = 'MPEG4'
+        scene.render.ffmpeg.codec = 'H264'
+        scene.render.ffmpeg.constant_rate_factor = 'HIGH'
+        scene.render.filepath = OUTPUT_PATH
+        print(f"Direct output: Blender FFmpeg H.264 → {OUTPUT_PATH}")
+        bpy.ops.render.render(animation=True)
+        direct_output = True
+    else:
+        # Blender appends the zero-padded frame number and extension: render_0001.jpg
+        scene.render.filepath = os.path.join(RENDER_DIR, "render_")
+        for first, last in ranges:
+            scene.frame_start = first
+            scene.frame_end = last
+            bpy.ops.render.render(animation=True)
+    bpy.app.handlers.render_write.remove(on_frame_written)
+    scene.frame_start = 1
+    scene.frame_end = total_anim_frames
 
     render_elapsed = time.time() - render_start
-    print(f"\n✓ Remaining frames rendered in {render_elapsed:.0f}s")
-
-# ── Assemble MP4 with ffmpeg ─────────────────────────────────
-print(f"\nAssembling MP4: {OUTPUT_PATH}")
-ffmpeg_cmd = [
-    "ffmpeg", "-y",
-    "-framerate", str(FPS),
-    "-i", os.path.join(RENDER_DIR, "render_%04d.png"),
-    "-c:v", "libx264",
-    "-crf", "18",
-    "-pix_fmt", "yuv420p",
-    OUTPUT_PATH
-]
-result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
-if result.returncode == 0:
+    print(f"\n✓ Remaining frames rendered in {render_elapsed:.0f}s ({len(ranges)} ranges)")
+
+    # ── Serve mode ────────────────────────────────────────────
+    if SERVE:
+        print("\nServing frame requests on stdin (one anim frame per line, EOF to finish)...")
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                anim_f = int(line)
+                if not 1 <= anim_f <= total_anim_frames:
+                    raise ValueError(f"outside 1..{total_anim_frames}")
+            except ValueError as e:
+                print(f"  ⚠ Ignoring request {line!r}: {e}")
+                continue
+            render_frame(path_frames[anim_f - 1])
+            print(f"  ✓ Frame {anim_f} rendered", flush=True)
+
+# ── Finish MP4 ────────────────────────────────────────────────
+if direct_output:
+    stream_ok = True  # Blender wrote the MP4 itself
+elif stream_enc is not None:
+    try:
+        stream_enc.stdin.close()
+    except BrokenPipeError:
+        stream_ok = False
+    # Every frame must have gone through the pipe for the streamed MP4 to count
+    stream_ok = stream_enc.wait() == 0 and stream_ok and next_stream_frame > total_anim_frames
+    stream_err.seek(0)
+    stream_msg = stream_err.read().decode(errors="replace")
+    stream_err.close()
+    if not stream_ok:
+        print(f"\n✗ Streaming encode failed: {stream_msg}")
+
+if stream_ok:
     duration_sec = total_anim_frames / FPS
     print(f"\n✓ Render complete! Output: {OUTPUT_PATH}")
     print(f"  Duration: {duration_sec:.1f}s ({total_anim_frames} frames at {FPS}fps)")
 else:
-    print(f"\n✗ ffmpeg failed: {result.stderr}")
-    raise SystemExit(1)
+    print(f"\nAssembling MP4: {OUTPUT_PATH}")
+    result = assemble(VIDEO_ENCODER)
+    if result.returncode != 0 and VIDEO_ENCODER != "libx264":
+        print(f"\n✗ {VIDEO_ENCODER} failed: {result.stderr}")
+        print("  Retrying with libx264...")
+        result = assemble("libx264")
+    if result.returncode == 0:
+        duration_sec = total_anim_frames / FPS
+        print(f"\n✓ Render complete! Output: {OUTPUT_PATH}")
+        print(f"  Duration: {duration_sec:.1f}s ({total_anim_frames} frames at {FPS}fps)")
+    else:
+        print(f"\n✗ ffmpeg failed: {result.stderr}")
+        raise SystemExit(1)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Run every test_*.py Blender render test in one Blender session.
+
+The scene is built once and each test only changes the globe rotation and
+texture, so the sweep pays Blender startup and scene setup once instead of
+four times. Textures are loaded once and shared across tests.
+
+Usage:
+    /Applications/Blender.app/Contents/MacOS/Blender --background --python scripts/run_all_tests.py
+"""
+
+import os
+import sys
+import time
+
+# Blender doesn't put the script's directory on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _globe_scene import build_globe_scene
+
+import test_rotation
+import test_gondwana
+import test_lat_rotation
+import test_crossfade
+
+TESTS = [test_rotation, test_gondwana, test_lat_rotation, test_crossfade]
+
+# All four tests render at the same resolution with EEVEE
+RES_X = 960
+RES_Y = 540
+
+scene_parts = build_globe_scene(RES_X, RES_Y)
+
+failed = []
+for module in TESTS:
+    name = module.__name__
+    print(f"\n{'='*60}\n{name}\n{'='*60}")
+    start = time.time()
+    try:
+        module.run(*scene_parts)
+    except Exception as e:
+        print(f"✗ {name} failed: {e}")
+        failed.append(name)
+        continue
+    print(f"  ({time.time() - start:.1f}s)")
+
+if failed:
+    print(f"\n✗ {len(failed)}/{len(TESTS)} tests failed: {', '.join(failed)}")
+    raise SystemExit(1)
+print(f"\n✓ All {len(TESTS)} render tests complete")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Render the test_yaxis.py cases in parallel, one headless Blender per shard.
+
+The tests share nothing but the scene setup, so each shard process builds
+its own scene and renders every Nth test into test_rotation/.
+
+Usage:
+    python3 scripts/run_yaxis_parallel.py            # 4 Blender processes
+    python3 scripts/run_yaxis_parallel.py --jobs 2
+    GLOBE_BLENDER=/path/to/blender python3 scripts/run_yaxis_parallel.py
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BLENDER = os.environ.get("GLOBE_BLENDER", "/Applications/Blender.app/Contents/MacOS/Blender")
+TEST_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_yaxis.py")
+# test_yaxis.py resolves ./frames and ./test_rotation against the cwd
+PROJECT_ROOT = os.path.dirname(os.path.dirname(TEST_SCRIPT))
+N_TESTS = 4  # len(tests) in test_yaxis.py; more jobs than tests would idle
+
+parser = argparse.ArgumentParser(description="Run test_yaxis.py shards in parallel.")
+parser.add_argument("--jobs", type=int, default=N_TESTS, metavar="N",
+                    help=f"Blender processes to launch (default: {N_TESTS})")
+args = parser.parse_args()
+jobs = max(1, min(args.jobs, N_TESTS))
+
+print(f"Launching {jobs} Blender processes for {N_TESTS} Y-axis tests...")
+start = time.time()
+procs = [
+    # Blender exits 0 even if the script raises, unless told otherwise
+    subprocess.Popen([BLENDER, "--background", "--python-exit-code", "1",
+                      "--python", TEST_SCRIPT, "--", "--shard", f"{k}/{jobs}"],
+                     cwd=PROJECT_ROOT)
+    for k in range(jobs)
+]
+failed = [k for k, proc in enumerate(procs) if proc.wait() != 0]
+elapsed = time.time() - start
+
+if failed:
+    print(f"\n✗ Shards failed: {failed}")
+    sys.exit(1)
+print(f"\n✓ Y-axis tests done: {jobs} shards in {elapsed:.1f}s")
@@ -3,14 +3,18 @@
 
 import bpy
 import os
-import glob
+import sys
 import math
 
+# Blender doesn't put the script's directory on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _globe_scene import build_globe_scene, load_image, list_frames
+
 FRAMES_DIR = os.path.abspath("./frames")
 TEST_DIR = os.path.abspath("./test_rotation")
-os.makedirs(TEST_DIR, exist_ok=True)
 
-frame_files = sorted(glob.glob(os.path.join(FRAMES_DIR, "globe_frame_*.png")))
+RES_X = 960
+RES_Y = 540
 GEO_IDX = 104  # 480 Ma
 
 # Different camera targets to try
@@ -25,89 +29,22 @@ tests = [
     ("gond_x_lon90_lat-50",  (math.radians(-50), 0, -math.radians(90)),           "X-axis: lon=90, lat=-50"),
 ]
 
-SPHERE_RADIUS = 2.0
-SPHERE_SEGMENTS = 128
-SPHERE_RINGS = 64
-CAMERA_DISTANCE = 8.0
-CAMERA_ELEVATION = 10
-
-bpy.ops.wm.read_factory_settings(use_empty=True)
-scene = bpy.context.scene
-scene.render.engine = 'BLENDER_EEVEE'
-scene.render.resolution_x = 960
-scene.render.resolution_y = 540
-scene.render.resolution_percentage = 100
-scene.render.image_settings.file_format = 'PNG'
-scene.render.image_settings.color_mode = 'RGB'
-
-bpy.ops.mesh.primitive_uv_sphere_add(
-    segments=SPHERE_SEGMENTS, ring_count=SPHERE_RINGS,
-    radius=SPHERE_RADIUS, location=(0, 0, 0),
-)
-globe = bpy.context.active_object
-bpy.ops.object.shade_smooth()
-
-mat = bpy.data.materials.new(name="GlobeMaterial")
-try:
-    mat.use_nodes = True
-except AttributeError:
-    pass
-nodes = mat.node_tree.nodes
-links = mat.node_tree.links
-nodes.clear()
-
-tex_coord = nodes.new('ShaderNodeTexCoord')
-tex_image = nodes.new('ShaderNodeTexImage')
-bsdf = nodes.new('ShaderNodeBsdfPrincipled')
-bsdf.inputs['Roughness'].default_value = 0.85
-bsdf.inputs['Specular IOR Level'].default_value = 0.05
-output_node = nodes.new('ShaderNodeOutputMaterial')
-
-img = bpy.data.images.load(frame_files[GEO_IDX])
-tex_image.image = img
-
-links.new(tex_coord.outputs['UV'], tex_image.inputs['Vector'])
-links.new(tex_image.outputs['Color'], bsdf.inputs['Base Color'])
-links.new(bsdf.outputs['BSDF'], output_node.inputs['Surface'])
-globe.data.materials.append(mat)
-
-cam_elev_rad = math.radians(CAMERA_ELEVATION)
-cam_x = CAMERA_DISTANCE * math.cos(cam_elev_rad)
-cam_z = CAMERA_DISTANCE * math.sin(cam_elev_rad)
-bpy.ops.object.camera_add(location=(cam_x, 0, cam_z))
-camera = bpy.context.active_object
-camera.data.lens = 35
-constraint = camera.constraints.new(type='TRACK_TO')
-constraint.target = globe
-constraint.track_axis = 'TRACK_NEGATIVE_Z'
-constraint.up_axis = 'UP_Y'
-scene.camera = camera
 
-bpy.ops.object.light_add(type='SUN', location=(10, 5, 10))
-key_light = bpy.context.active_object
-key_light.data.energy = 3.0
-key_light.parent = camera
+def run(scene, globe, tex_image, camera):
+    """Render the Gondwana views into the shared test scene."""
+    os.makedirs(TEST_DIR, exist_ok=True)
+    frame_files = list_frames(FRAMES_DIR)
+    tex_image.image = load_image(frame_files[GEO_IDX])
 
-bpy.ops.object.light_add(type='SUN', location=(-5, -10, -5))
-fill_light = bpy.context.active_object
-fill_light.data.energy = 1.0
-fill_light.parent = camera
+    for name, euler, desc in tests:
+        globe.rotation_euler = euler
+        scene.frame_set(1)
+        scene.render.filepath = os.path.join(TEST_DIR, name)
+        bpy.ops.render.render(write_still=True)
+        print(f"  Rendered: {name} — {desc}")
 
-world = bpy.data.worlds.new(name="SpaceBackground")
-scene.world = world
-try:
-    world.use_nodes = True
-except AttributeError:
-    pass
-bg_node = world.node_tree.nodes.get("Background")
-if bg_node:
-    bg_node.inputs['Color'].default_value = (0.005, 0.005, 0.02, 1.0)
+    print("\n✓ Gondwana rotation tests complete")
 
-for name, euler, desc in tests:
-    globe.rotation_euler = euler
-    scene.frame_set(1)
-    scene.render.filepath = os.path.join(TEST_DIR, name)
-    bpy.ops.render.render(write_still=True)
-    print(f"  Rendered: {name} — {desc}")
 
-print("\n✓ Gondwana rotation tests complete")
+if __name__ == "__main__":
+    run(*build_globe_scene(RES_X, RES_Y))
@@ -6,20 +6,28 @@ to validate the entire data + rendering pipeline before the full batch run.
 
 import os
 import sys
+import json
+import hashlib
+import struct
+import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Headless rendering — no GUI
 import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
 import cartopy.crs as ccrs
 
 # ── Configuration ──────────────────────────────────────────────
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(PROJECT_ROOT, "data", "plate-models")
 FRAMES_DIR = os.path.join(PROJECT_ROOT, "frames")
+CACHE_DIR = os.path.join(PROJECT_ROOT, "data", "cache")
 OUTPUT_PATH = os.path.join(FRAMES_DIR, "test_frame.png")
 TEST_TIME = 200  # Ma — Pangaea assembly, a well-known configuration
 IMAGE_WIDTH = 4096
 IMAGE_HEIGHT = 2048
 DPI = 200
+# PNG zlib level — 1 encodes several times faster than matplotlib's default
+PNG_COMPRESS_LEVEL = 1
 
 os.makedirs(FRAMES_DIR, exist_ok=True)
 
@@ -28,11 +36,12 @@ print(f"Loading Merdith2021 plate model (data_dir={DATA_DIR})...")
 print("(First run will download ~13 MB from EarthByte servers)")
 
 try:
-    from plate_model_manager import PlateModelManager
     import gplately
+    from _plate_model import open_model
 
-    pm_manager = PlateModelManager()
-    model_data = pm_manager.get_model("Merdith2021", data_dir=DATA_DIR)
+    # A complete local copy is read straight from disk (no network); a
+    # missing or partial one is downloaded through PlateModelManager
+    model_data = open_model(DATA_DIR)
 
     rotation_model = model_data.get_rotation_model()
     topology_features = model_data.get_topologies()
@@ -60,118 +69,189 @@ except Exception as e:
     print("Falling back to raw pygplates approach...")
     USE_GPLATELY = False
 
-# ── Render the frame ──────────────────────────────────────────
-fig_w = IMAGE_WIDTH / DPI
-fig_h = IMAGE_HEIGHT / DPI
-fig = plt.figure(figsize=(fig_w, fig_h), dpi=DPI)
-ax = fig.add_axes([0, 0, 1, 1], projection=ccrs.PlateCarree(central_longitude=0))
-ax.set_global()
-ax.set_axis_off()
-
-# Ocean background
-ax.set_facecolor('#1a425a')
-
-if USE_GPLATELY:
-    # Use gplately's PlotTopologies for rich rendering
-    try:
-        gplot.plot_continents(ax, facecolor='#a07c5a', edgecolor='none', alpha=0.9)
-        print("✓ Continents plotted")
-    except Exception as e:
-        print(f"⚠ plot_continents failed: {e}")
-
-    try:
-        gplot.plot_coastlines(ax, color='#5c442e', linewidth=0.5)
-        print("✓ Coastlines plotted")
-    except Exception as e:
-        print(f"⚠ plot_coastlines failed: {e}")
-
-    try:
-        gplot.plot_ridges(ax, color='#ff6b35', linewidth=0.8)
-        print("✓ Ridges plotted")
-    except Exception as e:
-        print(f"⚠ plot_ridges failed: {e}")
-
-    try:
-        gplot.plot_transforms(ax, color='#ff6b35', linewidth=0.6, alpha=0.7)
-        print("✓ Transforms plotted")
-    except Exception as e:
-        print(f"⚠ plot_transforms failed: {e}")
-
-    try:
-        gplot.plot_trenches(ax, color='#e63946', linewidth=0.8)
-        print("✓ Trenches plotted")
-    except Exception as e:
-        print(f"⚠ plot_trenches failed: {e}")
-
-    try:
-        gplot.plot_subduction_teeth(ax, color='#e63946')
-        print("✓ Subduction teeth plotted")
-    except Exception as e:
-        print(f"⚠ plot_subduction_teeth failed: {e}")
-
-else:
+# ── Fallback coastline reconstruction ─────────────────────────
+if not USE_GPLATELY:
     # Fallback: raw pygplates approach (from Gemini reference script)
-    import pygplates
+    from _plate_model import find_fallback_files
+
+    rot_file, gpml_file = find_fallback_files(DATA_DIR)
 
-    # Find .rot and coastline .gpml files
-    rot_files = []
-    gpml_files = []
-    for root, dirs, files in os.walk(DATA_DIR):
-        for f in files:
-            if f.endswith('.rot'):
-                rot_files.append(os.path.join(root, f))
-            if f.endswith('.gpml') and 'coastline' in f.lower():
-                gpml_files.append(os.path.join(root, f))
-
-    if not rot_files or not gpml_files:
+    if rot_file is None or gpml_file is None:
         print("✗ ERROR: Could not find .rot or coastline .gpml files in", DATA_DIR)
         sys.exit(1)
 
-    print(f"Using rotation file: {rot_files[0]}")
-    print(f"Using coastlines file: {gpml_files[0]}")
-
-    rotation_model = pygplates.RotationModel(rot_files[0])
-    coastline_features = pygplates.FeatureCollection(gpml_files[0])
-
-    reconstructed_geometries = []
-    pygplates.reconstruct(coastline_features, rotation_model, reconstructed_geometries, TEST_TIME)
-
-    for rg in reconstructed_geometries:
-        polygon = rg.get_reconstructed_geometry()
-        if polygon:
-            points = polygon.to_lat_lon_list()
-            lons = [p[1] for p in points]
-            lats = [p[0] for p in points]
-            ax.fill(lons, lats, color='#a07c5a', edgecolor='#5c442e',
-                    linewidth=0.5, transform=ccrs.Geodetic())
-
-    print(f"✓ Plotted {len(reconstructed_geometries)} reconstructed geometries")
-
-# Time label
-ax.text(0.02, 0.02, f'{TEST_TIME} Ma',
-        transform=ax.transAxes, fontsize=16, color='white',
-        fontweight='bold', va='bottom',
-        bbox=dict(boxstyle='round,pad=0.3', facecolor='black', alpha=0.6))
-
-# ── Save ──────────────────────────────────────────────────────
-fig.savefig(OUTPUT_PATH, dpi=DPI, facecolor='#1a425a', pad_inches=0)
-plt.close(fig)
-
-# Verify output
-if os.path.exists(OUTPUT_PATH):
-    size_mb = os.path.getsize(OUTPUT_PATH) / (1024 * 1024)
-    from PIL import Image
-    with Image.open(OUTPUT_PATH) as img:
+    print(f"Using rotation file: {rot_file}")
+    print(f"Using coastlines file: {gpml_file}")
+
+
+def fallback_coastlines(time_ma):
+    """Reconstructed coastlines at time_ma as (lats, lons, offsets) in CSR layout."""
+    # Reconstructed coastlines are cached as flat float32 lat/lon arrays plus
+    # polygon start offsets (CSR layout), keyed by the input files and time
+    key_src = [(os.path.relpath(p, DATA_DIR), os.path.getsize(p), int(os.path.getmtime(p)))
+               for p in (rot_file, gpml_file)]
+    key = hashlib.sha1(json.dumps([key_src, time_ma]).encode()).hexdigest()[:16]
+    recon_cache = os.path.join(CACHE_DIR, f"test_coastlines_{time_ma}Ma_{key}.npz")
+
+    if os.path.exists(recon_cache):
+        with np.load(recon_cache) as data:
+            all_lats, all_lons, offsets = data["lats"], data["lons"], data["offsets"]
+        print(f"✓ Reconstruction loaded from cache: {recon_cache}")
+        return all_lats, all_lons, offsets
+
+    import pygplates
+
+    rotation_model = pygplates.RotationModel(str(rot_file))
+    coastline_features = pygplates.FeatureCollection(str(gpml_file))
+
+    # Coastlines are plain plate-ID features: rotate their present-day
+    # geometry by each plate's finite rotation, fetched once per plate
+    # rather than once per feature inside pygplates.reconstruct
+    rotations = {}
+    polys = []
+    for feature in coastline_features:
+        if not feature.is_valid_at_time(time_ma):
+            continue
+        plate_id = feature.get_reconstruction_plate_id()
+        rotation = rotations.get(plate_id)
+        if rotation is None:
+            rotation = rotations[plate_id] = rotation_model.get_rotation(time_ma, plate_id)
+        for polygon in feature.get_geometries():
+            polys.append((rotation * polygon).to_lat_lon_array().astype(np.float32))
+    print(f"  Reconstructed with {len(rotations)} plate rotations")
+
+    offsets = np.zeros(len(polys) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in polys])
+    latlon = np.concatenate(polys) if polys else np.empty((0, 2), dtype=np.float32)
+    all_lats, all_lons = latlon[:, 0], latlon[:, 1]
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.savez(recon_cache, lats=all_lats, lons=all_lons, offsets=offsets)
+    return all_lats, all_lons, offsets
+
+
+# ── Render the frame ──────────────────────────────────────────
+def make_figure():
+    """Create the full-frame PlateCarree figure and axes reused by render_frame."""
+    fig_w = IMAGE_WIDTH / DPI
+    fig_h = IMAGE_HEIGHT / DPI
+    fig = plt.figure(figsize=(fig_w, fig_h), dpi=DPI)
+    ax = fig.add_axes([0, 0, 1, 1], projection=ccrs.PlateCarree(central_longitude=0))
+    reset_axes(ax)
+    return fig, ax
+
+
+def reset_axes(ax):
+    """Drop the previous frame's artists and restore the map extent/styling."""
+    # ax.clear() also catches cartopy FeatureArtists, which older cartopy
+    # keeps in ax.artists rather than ax.collections
+    ax.clear()
+    ax.set_global()
+    ax.set_axis_off()
+
+    # Ocean background
+    ax.set_facecolor('#1a425a')
+
+
+def render_frame(time_ma, fig, ax, out_path):
+    """
+    Draw and save the frame for time_ma onto an existing figure.
+
+    The axes are cleared and restyled rather than the figure closed,
+    so a sweep of times keeps one Agg canvas and GeoAxes alive.
+    """
+    reset_axes(ax)
+
+    if USE_GPLATELY:
+        if gplot.time != time_ma:
+            gplot.time = time_ma
+
+        # Use gplately's PlotTopologies for rich rendering
+        try:
+            gplot.plot_continents(ax, facecolor='#a07c5a', edgecolor='none', alpha=0.9)
+            print("✓ Continents plotted")
+        except Exception as e:
+            print(f"⚠ plot_continents failed: {e}")
+
+        try:
+            gplot.plot_coastlines(ax, color='#5c442e', linewidth=0.5)
+            print("✓ Coastlines plotted")
+        except Exception as e:
+            print(f"⚠ plot_coastlines failed: {e}")
+
+        try:
+            gplot.plot_ridges(ax, color='#ff6b35', linewidth=0.8)
+            print("✓ Ridges plotted")
+        except Exception as e:
+            print(f"⚠ plot_ridges failed: {e}")
+
+        try:
+            gplot.plot_transforms(ax, color='#ff6b35', linewidth=0.6, alpha=0.7)
+            print("✓ Transforms plotted")
+        except Exception as e:
+            print(f"⚠ plot_transforms failed: {e}")
+
+        try:
+            gplot.plot_trenches(ax, color='#e63946', linewidth=0.8)
+            print("✓ Trenches plotted")
+        except Exception as e:
+            print(f"⚠ plot_trenches failed: {e}")
+
+        try:
+            gplot.plot_subduction_teeth(ax, color='#e63946')
+            print("✓ Subduction teeth plotted")
+        except Exception as e:
+            print(f"⚠ plot_subduction_teeth failed: {e}")
+
+    else:
+        all_lats, all_lons, offsets = fallback_coastlines(time_ma)
+
+        # The map is global, so no polygon falls outside the viewport; only
+        # degenerate ones (< 3 vertices) are culled before projection
+        starts, ends = offsets[:-1], offsets[1:]
+        keep = (ends - starts) >= 3
+
+        # One collection for every polygon instead of an artist per ax.fill()
+        lonlat = np.column_stack([all_lons, all_lats])
+        verts = [lonlat[start:end] for start, end in zip(starts[keep], ends[keep])]
+        coast_pc = PolyCollection(verts, facecolor='#a07c5a', edgecolor='#5c442e', linewidth=0.5,
+                                  transform=ccrs.Geodetic()._as_mpl_transform(ax))
+        ax.add_collection(coast_pc, autolim=False)
+
+        print(f"✓ Plotted {len(verts)} reconstructed geometries"
+              f" ({len(keep) - len(verts)} degenerate skipped)")
+
+    # Time label
+    ax.text(0.02, 0.02, f'{time_ma} Ma',
+            transform=ax.transAxes, fontsize=16, color='white',
+            fontweight='bold', va='bottom',
+            bbox=dict(boxstyle='round,pad=0.3', facecolor='black', alpha=0.6))
+
+    # ── Save ──────────────────────────────────────────────────
+    fig.savefig(out_path, dpi=DPI, facecolor='#1a425a', pad_inches=0,
+                pil_kwargs={"compress_level": PNG_COMPRESS_LEVEL, "optimize": False})
+
+
+if __name__ == "__main__":
+    fig, ax = make_figure()
+    render_frame(TEST_TIME, fig, ax, OUTPUT_PATH)
+    plt.close(fig)
+
+    # Verify output
+    if os.path.exists(OUTPUT_PATH):
+        size_mb = os.path.getsize(OUTPUT_PATH) / (1024 * 1024)
+        # Width/height straight from the IHDR chunk (bytes 16-24) — no decode
+        with open(OUTPUT_PATH, 'rb') as f:
+            width, height = struct.unpack('>II', f.read(24)[16:24])
         print(f"\n✓ Test frame saved: {OUTPUT_PATH}")
-        print(f"  Dimensions: {img.size[0]}x{img.size[1]}")
+        print(f"  Dimensions: {width}x{height}")
         print(f"  File size: {size_mb:.1f} MB")
-        if img.size[0] / img.size[1] == 2.0:
+        if width / height == 2.0:
             print("  Aspect ratio: 2:1 ✓ (correct for equirectangular)")
         else:
-            ratio = img.size[0] / img.size[1]
+            ratio = width / height
             print(f"  Aspect ratio: {ratio:.2f}:1 ⚠ (should be 2:1 for equirectangular)")
-else:
-    print(f"\n✗ ERROR: Output file not created at {OUTPUT_PATH}")
-    sys.exit(1)
+    else:
+        print(f"\n✗ ERROR: Output file not created at {OUTPUT_PATH}")
+        sys.exit(1)
 
-print("\n🌍 Pipeline test PASSED. Ready for full frame generation.")
+    print("\n🌍 Pipeline test PASSED. Ready for full frame generation.")
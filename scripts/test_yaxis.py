@@ -1,16 +1,29 @@
 #!/usr/bin/env python3
-"""Test Y-axis rotation for present day and Pangaea to make sure they still look right."""
+"""
+Test Y-axis rotation for present day and Pangaea to make sure they still look right.
+
+Usage:
+    /Applications/Blender.app/Contents/MacOS/Blender --background --python scripts/test_yaxis.py
+    ... --python scripts/test_yaxis.py -- --shard 1/4   # only tests 1, 5, ...
+    python3 scripts/run_yaxis_parallel.py               # every shard in parallel
+"""
 
 import bpy
+import bmesh
 import os
-import glob
+import sys
+import argparse
 import math
 
+# Blender doesn't put the script's directory on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _globe_scene import list_frames, eevee_engine_id
+
 FRAMES_DIR = os.path.abspath("./frames")
 TEST_DIR = os.path.abspath("./test_rotation")
 os.makedirs(TEST_DIR, exist_ok=True)
 
-frame_files = sorted(glob.glob(os.path.join(FRAMES_DIR, "globe_frame_*.png")))
+frame_files = list_frames(FRAMES_DIR)
 
 # Test cases: (name, geo_idx, cam_lon, cam_lat)
 tests = [
@@ -20,27 +33,60 @@ tests = [
     ("yaxis_900ma",   20, 109.6, -23.3),   # Rodinia
 ]
 
+# Script arguments follow Blender's own after "--"
+parser = argparse.ArgumentParser(description="Render the Y-axis rotation tests.")
+parser.add_argument("--shard", default="0/1", metavar="K/N",
+                    help="render only tests K, K+N, K+2N, ... (default: all)")
+args = parser.parse_args(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else [])
+shard_k, shard_n = (int(v) for v in args.shard.split("/"))
+if not 0 <= shard_k < shard_n:
+    parser.error(f"invalid --shard {args.shard}: need 0 <= K < N")
+tests = tests[shard_k::shard_n]
+
 SPHERE_RADIUS = 2.0
-SPHERE_SEGMENTS = 128
-SPHERE_RINGS = 64
+# Quarter of the production tessellation: at 960x540 the 128x64 sphere's
+# faces are already sub-pixel, so this only cuts raster work
+SPHERE_SEGMENTS = 64
+SPHERE_RINGS = 32
 CAMERA_DISTANCE = 8.0
 CAMERA_ELEVATION = 10
+# Diffuse sphere lit by two suns: a handful of samples is plenty for a
+# rotation check
+EEVEE_TAA_SAMPLES = 4
 
 bpy.ops.wm.read_factory_settings(use_empty=True)
+# After the factory reset, which restores preferences: nothing here needs undo
+bpy.context.preferences.edit.use_global_undo = False
 scene = bpy.context.scene
-scene.render.engine = 'BLENDER_EEVEE'
+scene.frame_current = 1
+scene.render.engine = eevee_engine_id()
+scene.eevee.taa_render_samples = EEVEE_TAA_SAMPLES
+# Screen-space effects the material never shows (absent on EEVEE Next)
+for prop in ('use_gtao', 'use_ssr', 'use_bloom'):
+    if hasattr(scene.eevee, prop):
+        setattr(scene.eevee, prop, False)
 scene.render.resolution_x = 960
 scene.render.resolution_y = 540
 scene.render.resolution_percentage = 100
 scene.render.image_settings.file_format = 'PNG'
 scene.render.image_settings.color_mode = 'RGB'
 
-bpy.ops.mesh.primitive_uv_sphere_add(
-    segments=SPHERE_SEGMENTS, ring_count=SPHERE_RINGS,
-    radius=SPHERE_RADIUS, location=(0, 0, 0),
-)
-globe = bpy.context.active_object
-bpy.ops.object.shade_smooth()
+# Scene objects are built through the data API rather than bpy.ops, which
+# skips operator poll/undo overhead on every call
+mesh = bpy.data.meshes.new("Sphere")
+bm = bmesh.new()
+bm.loops.layers.uv.new("UVMap")  # calc_uvs only fills an existing layer
+bmesh.ops.create_uvsphere(bm, u_segments=SPHERE_SEGMENTS, v_segments=SPHERE_RINGS,
+                          radius=SPHERE_RADIUS, calc_uvs=True)
+bm.to_mesh(mesh)
+bm.free()
+globe = bpy.data.objects.new("Sphere", mesh)
+scene.collection.objects.link(globe)
+# Smooth shading set on the mesh directly instead of via the operator. A UV
+# sphere needs no sharp edges, so plain per-face smoothing suffices (auto
+# smooth's angle threshold is gone from Blender 4.1+ anyway)
+globe.data.polygons.foreach_set("use_smooth", [True] * len(globe.data.polygons))
+globe.data.update()
 
 mat = bpy.data.materials.new(name="GlobeMaterial")
 try:
@@ -55,11 +101,18 @@ tex_coord = nodes.new('ShaderNodeTexCoord')
 tex_image = nodes.new('ShaderNodeTexImage')
 bsdf = nodes.new('ShaderNodeBsdfPrincipled')
 bsdf.inputs['Roughness'].default_value = 0.85
-bsdf.inputs['Specular IOR Level'].default_value = 0.05
+bsdf.inputs['Specular IOR Level'].default_value = 0.0  # no highlight worth sampling
 output_node = nodes.new('ShaderNodeOutputMaterial')
 
-img = bpy.data.images.load(frame_files[0])
-tex_image.image = img
+# Every test texture is loaded once up front and kept resident; the loop
+# only rebinds which one the shader samples
+images = {}
+for _, geo_idx, _, _ in tests:
+    if geo_idx not in images:
+        img = bpy.data.images.load(frame_files[geo_idx], check_existing=True)
+        img.use_fake_user = True
+        images[geo_idx] = img
+tex_image.image = images[tests[0][1]]
 
 links.new(tex_coord.outputs['UV'], tex_image.inputs['Vector'])
 links.new(tex_image.outputs['Color'], bsdf.inputs['Base Color'])
@@ -69,8 +122,9 @@ globe.data.materials.append(mat)
 cam_elev_rad = math.radians(CAMERA_ELEVATION)
 cam_x = CAMERA_DISTANCE * math.cos(cam_elev_rad)
 cam_z = CAMERA_DISTANCE * math.sin(cam_elev_rad)
-bpy.ops.object.camera_add(location=(cam_x, 0, cam_z))
-camera = bpy.context.active_object
+camera = bpy.data.objects.new("Camera", bpy.data.cameras.new("Camera"))
+camera.location = (cam_x, 0, cam_z)
+scene.collection.objects.link(camera)
 camera.data.lens = 35
 constraint = camera.constraints.new(type='TRACK_TO')
 constraint.target = globe
@@ -78,15 +132,16 @@ constraint.track_axis = 'TRACK_NEGATIVE_Z'
 constraint.up_axis = 'UP_Y'
 scene.camera = camera
 
-bpy.ops.object.light_add(type='SUN', location=(10, 5, 10))
-key_light = bpy.context.active_object
-key_light.data.energy = 3.0
-key_light.parent = camera
+def add_sun(name, location, energy):
+    light = bpy.data.objects.new(name, bpy.data.lights.new(name, type='SUN'))
+    light.location = location
+    light.data.energy = energy
+    light.parent = camera
+    scene.collection.objects.link(light)
+    return light
 
-bpy.ops.object.light_add(type='SUN', location=(-5, -10, -5))
-fill_light = bpy.context.active_object
-fill_light.data.energy = 1.0
-fill_light.parent = camera
+key_light = add_sun("KeyLight", (10, 5, 10), 3.0)
+fill_light = add_sun("FillLight", (-5, -10, -5), 1.0)
 
 world = bpy.data.worlds.new(name="SpaceBackground")
 scene.world = world
@@ -100,18 +155,15 @@ if bg_node:
 
 for name, geo_idx, cam_lon, cam_lat in tests:
     # Swap texture
-    old_img = tex_image.image
-    new_img = bpy.data.images.load(frame_files[geo_idx], check_existing=True)
-    tex_image.image = new_img
-    if old_img and old_img != new_img:
-        bpy.data.images.remove(old_img)
+    tex_image.image = images[geo_idx]
 
     # Y-axis rotation: (0, -radians(lat), -radians(lon))
     rot_y = -math.radians(cam_lat)
     rot_z = -math.radians(cam_lon)
     globe.rotation_euler = (0, rot_y, rot_z)
 
-    scene.frame_set(1)
+    # No frame_set(): the render evaluates the depsgraph itself, so an extra
+    # full update per test would only be repeated
     scene.render.filepath = os.path.join(TEST_DIR, name)
     bpy.ops.render.render(write_still=True)
     print(f"  {name}: lon={cam_lon}, lat={cam_lat}, euler=(0, {math.degrees(rot_y):.1f}°, {math.degrees(rot_z):.1f}°)")